@@ -1,8 +1,19 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils.html import format_html
 from django.db.models import Count
+from django.utils import timezone
+import io
+from itertools import islice
+from django.conf import settings
+from core.export import export_response, USER_EXPORT_FIELDS
+from .forms import UserImportUploadForm
+from .importer import UserImporter, detect_format, queue_upload, read_rows
 from .models import User
+from .tokens import invalidate_user_state
 
 
 @admin.register(User)
@@ -14,6 +25,7 @@ class CustomUserAdmin(UserAdmin):
     search_fields = ('email', 'username', 'full_name', 'phone')
     ordering = ('-date_joined',)
     list_editable = ('is_active', 'is_verified')
+    change_list_template = 'admin/accounts/user/change_list.html'
     
     # Custom fieldsets for our User model
     fieldsets = (
@@ -67,28 +79,97 @@ class CustomUserAdmin(UserAdmin):
         """Optimize queries"""
         return super().get_queryset(request).select_related()
     
-    actions = ['make_verified', 'make_unverified', 'activate_users', 'deactivate_users']
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='accounts_user_import'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Bulk create users from an uploaded CSV or JSON Lines file"""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        
+        result = None
+        if request.method == 'POST':
+            form = UserImportUploadForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                fmt = form.cleaned_data['format'] or detect_format(upload.name)
+                stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+                max_rows = getattr(settings, 'USER_IMPORT_ADMIN_MAX_ROWS', 50)
+                rows = list(islice(read_rows(stream, fmt), max_rows + 1))
+                if len(rows) > max_rows:
+                    # Too many passwords to hash before the request times out
+                    stream.detach()
+                    upload.seek(0)
+                    path = queue_upload(upload.chunks(), fmt)
+                    self.message_user(
+                        request,
+                        f'{upload.name} has more than {max_rows} rows, so it was queued as {path.name}. '
+                        f'It will be imported by the next run of "manage.py import_users --queued".',
+                    )
+                else:
+                    # Hash in this process: a pool per request would fork the web worker
+                    result = UserImporter(workers=1).run(rows)
+                    self.message_user(
+                        request,
+                        f'Imported {result.created} users with {len(result.errors)} errors '
+                        f'({result.rows_per_second:.0f} rows/sec).',
+                    )
+        else:
+            form = UserImportUploadForm()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import users',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+            'max_rows': getattr(settings, 'USER_IMPORT_ADMIN_MAX_ROWS', 50),
+        }
+        return TemplateResponse(request, 'admin/accounts/user/import_users.html', context)
+    
+    actions = ['make_verified', 'make_unverified', 'activate_users', 'deactivate_users', 'export_csv', 'export_jsonl']
     
     def make_verified(self, request, queryset):
         """Bulk verify users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_verified=True)
+        invalidate_user_state(*user_ids)
         self.message_user(request, f'{updated} users were successfully verified.')
     make_verified.short_description = "Mark selected users as verified"
     
     def make_unverified(self, request, queryset):
         """Bulk unverify users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_verified=False)
+        invalidate_user_state(*user_ids)
         self.message_user(request, f'{updated} users were marked as unverified.')
     make_unverified.short_description = "Mark selected users as unverified"
     
     def activate_users(self, request, queryset):
         """Bulk activate users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=True)
+        invalidate_user_state(*user_ids)
         self.message_user(request, f'{updated} users were successfully activated.')
     activate_users.short_description = "Activate selected users"
     
     def deactivate_users(self, request, queryset):
         """Bulk deactivate users"""
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        invalidate_user_state(*user_ids)
         self.message_user(request, f'{updated} users were deactivated.')
     deactivate_users.short_description = "Deactivate selected users"
+    
+    def export_csv(self, request, queryset):
+        """Stream selected users as CSV"""
+        return export_response(queryset, USER_EXPORT_FIELDS, 'csv', f'users-{timezone.now():%Y%m%d}')
+    export_csv.short_description = "Export selected users as CSV"
+    
+    def export_jsonl(self, request, queryset):
+        """Stream selected users as JSON Lines"""
+        return export_response(queryset, USER_EXPORT_FIELDS, 'jsonl', f'users-{timezone.now():%Y%m%d}')
+    export_jsonl.short_description = "Export selected users as JSON Lines"
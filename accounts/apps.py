@@ -5,3 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'User Accounts'
+
+    def ready(self):
+        # Register cached user state invalidation handlers
+        from . import signals  # noqa: F401
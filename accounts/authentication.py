@@ -0,0 +1,78 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import USER_CLAIMS, get_user_state
+
+
+class ClaimsUser:
+    """
+    Authenticated user backed by JWT claims.
+
+    The id and the claims embedded by ClaimsRefreshToken are answered from
+    the token; touching any other attribute loads the User row once.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, claims):
+        self.id = self.pk = user_id
+        for claim in USER_CLAIMS:
+            setattr(self, claim, claims[claim])
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.pk)
+
+    def __getattr__(self, name):
+        # Only called for attributes not answered by the claims
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        return isinstance(other, (ClaimsUser, User)) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.email
+
+    def get_dashboard_url(self):
+        return User(role=self.role).get_dashboard_url()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the per-request User query.
+
+    Tokens carrying profile claims are checked against a briefly cached copy
+    of the user's current values: a deactivated or deleted user is rejected,
+    and a user whose claims have changed is loaded from the database instead.
+    Tokens issued without claims fall back to the standard lookup.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationFailed(_('Token contained no recognizable user identification'), code='user_not_found')
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        claims = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        if claims != state:
+            return super().get_user(validated_token)
+        return ClaimsUser(user_id, claims)
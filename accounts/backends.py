@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate against the user's email address with a single lookup.
+
+    Accepts either ``email`` or the standard ``username`` keyword, so the
+    admin login keeps working, and replaces ModelBackend rather than sitting
+    in front of it so a failed attempt is not looked up a second time.
+    """
+
+    def authenticate(self, request, email=None, password=None, username=None, **kwargs):
+        UserModel = get_user_model()
+        if email is None:
+            email = username if username is not None else kwargs.get(UserModel.USERNAME_FIELD)
+        if email is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get(email=email)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
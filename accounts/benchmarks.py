@@ -0,0 +1,185 @@
+"""Benchmarks for accounts (see core.benchmark)"""
+import random
+import time
+import uuid
+from datetime import timedelta
+from itertools import count
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from core.benchmark import benchmark, timed
+
+from .models import User
+from .revocation import revocation_set
+from .serializers import UserRegistrationSerializer
+from .tokens import ClaimsRefreshToken
+
+SEED_BATCH_SIZE = 10000
+DASHBOARDS = (
+    ('PATIENT', 'patient_dashboard'),
+    ('CLINICIAN', 'clinician_dashboard'),
+    ('ORGANIZATION', 'organization_dashboard'),
+)
+SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'accounts.sessions',
+)
+
+
+def _seed_blacklist(user, count):
+    """count rotated refresh tokens, all blacklisted and half of them expired"""
+    now = timezone.now()
+    for start in range(1, count + 1, SEED_BATCH_SIZE):
+        ids = range(start, min(start + SEED_BATCH_SIZE, count + 1))
+        OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                id=i, user=user, jti=uuid.uuid4().hex, token='',
+                created_at=now, expires_at=now + timedelta(days=1 if i % 2 else -1),
+            )
+            for i in ids
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(id=i, token_id=i) for i in ids])
+
+
+@benchmark(size=1000000)
+def token_refresh(size):
+    """Refresh throughput with size blacklisted tokens, and the cost of a filter rebuild"""
+    user = User.objects.create_user('patient', 'patient@example.com', 'x')
+    _seed_blacklist(user, size)
+    jtis = list(OutstandingToken.objects.values_list('jti', flat=True)[:1000])
+
+    def lookup():
+        BlacklistedToken.objects.filter(token__jti=random.choice(jtis)).exists()
+    yield 'blacklist lookup in the database', timed(lookup, 1000)
+
+    # Until the previous fix every refresh in the process waited this long
+    # whenever the interval elapsed
+    yield 'revocation filter rebuild', timed(revocation_set._rebuild, 1)
+
+    client = Client()
+    url = reverse('token_refresh')
+    refresh = [str(ClaimsRefreshToken.for_user(user))]
+
+    def rotate():
+        response = client.post(url, {'refresh': refresh[0]}, content_type='application/json')
+        assert response.status_code == 200, response.content
+        refresh[0] = response.json()['refresh']
+    yield 'refresh', timed(rotate, 500)
+
+    # Another thread is rebuilding: refreshes use the current filter meanwhile
+    with revocation_set._rebuild_lock:
+        revocation_set._built_at = time.monotonic() - 10 ** 6
+        yield 'refresh while a rebuild is in progress', timed(rotate, 500)
+
+
+def _create_then_set_password(self, validated_data):
+    """Registration as it was before single-write signups: insert, then save the hash"""
+    validated_data.pop('confirm_password')
+    password = validated_data.pop('password')
+    validated_data['username'] = validated_data['email']
+    user = User.objects.create_user(**validated_data)
+    user.set_password(password)
+    user.save()
+    return user
+
+
+@benchmark(size=200)
+def signup(size):
+    """Signups per second through the API, with one write or two per user"""
+    client = Client()
+    url = reverse('signup_api')
+    numbers = count()
+
+    def register():
+        n = next(numbers)
+        response = client.post(url, {
+            'full_name': f'Patient {n}', 'email': f'patient{n}@example.com', 'phone': f'+1555{n:07d}',
+            'password': 'Str0ng-passphrase!', 'confirm_password': 'Str0ng-passphrase!', 'role': 'PATIENT',
+        }, content_type='application/json')
+        assert response.status_code == 201, response.content
+
+    # Hashing dominates with the configured hasher, so the write cost is
+    # also measured with a fast one
+    hashers = [
+        ('configured hasher', settings.PASSWORD_HASHERS, max(1, size // 10)),
+        ('MD5 hasher', ['django.contrib.auth.hashers.MD5PasswordHasher'], size),
+    ]
+    for hasher, password_hashers, repeat in hashers:
+        with override_settings(RATELIMIT_ENABLED=False, PASSWORD_HASHERS=password_hashers):
+            with mock.patch.object(UserRegistrationSerializer, 'create', _create_then_set_password):
+                yield f'insert then save the password, {hasher}', timed(register, repeat)
+            yield f'single insert, {hasher}', timed(register, repeat)
+
+
+@benchmark(size=200)
+def login_dashboard(size):
+    """Login and dashboard views for each session engine"""
+    password_hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    with override_settings(RATELIMIT_ENABLED=False, PASSWORD_HASHERS=password_hashers):
+        User.objects.create_user(
+            'patient@example.com', 'patient@example.com', 'Str0ng-passphrase!',
+            full_name='Patient', role='PATIENT',
+        )
+        login_url = reverse('login')
+        dashboard_url = reverse('patient_dashboard')
+        for engine in SESSION_ENGINES:
+            cache.clear()
+            with override_settings(SESSION_ENGINE=engine):
+                client = Client()
+
+                def log_in():
+                    client.cookies.clear()
+                    response = client.post(login_url, {'email': 'patient@example.com', 'password': 'Str0ng-passphrase!'})
+                    assert response.status_code == 302, response.status_code
+                yield f'{engine}: login', timed(log_in, size)
+
+                def dashboard():
+                    response = client.get(dashboard_url)
+                    assert response.status_code == 200, response.status_code
+                dashboard()
+                with CaptureQueriesContext(connection) as queries:
+                    dashboard()
+                yield f'{engine}: dashboard ({len(queries)} queries)', timed(dashboard, size)
+
+
+def _template_loaders(cached):
+    """TEMPLATES with the loaders wrapped in the cached loader or not"""
+    loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    options = {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': loaders}
+    return [{**settings.TEMPLATES[0], 'APP_DIRS': False, 'OPTIONS': options}]
+
+
+@benchmark(size=500)
+def dashboard_render(size):
+    """Each role dashboard with and without the cached loader and sidebar fragment cache"""
+    variants = [
+        ('templates parsed per request', False, 0),
+        ('cached loader', True, 0),
+        ('cached loader and sidebar cache', True, settings.DASHBOARD_FRAGMENT_CACHE_TIMEOUT or 3600),
+    ]
+    for role, url_name in DASHBOARDS:
+        user = User.objects.create_user(f'{role.lower()}@example.com', f'{role.lower()}@example.com', 'x', role=role)
+        client = Client()
+        client.force_login(user)
+        url = reverse(url_name)
+
+        def render():
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+
+        for label, cached, fragment_timeout in variants:
+            cache.clear()
+            with override_settings(TEMPLATES=_template_loaders(cached), DASHBOARD_FRAGMENT_CACHE_TIMEOUT=fragment_timeout):
+                render()  # warm up
+                yield f'{url_name}, {label}', timed(render, size)
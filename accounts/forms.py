@@ -108,21 +108,44 @@ class LoginForm(forms.Form):
         password = self.cleaned_data.get('password')
         
         if email and password:
-            try:
-                user_obj = User.objects.get(email=email)
-                self.user_cache = authenticate(
-                    self.request,
-                    username=user_obj.username,
-                    password=password
-                )
-                if self.user_cache is None:
-                    raise forms.ValidationError("Invalid email or password.")
-                elif not self.user_cache.is_active:
-                    raise forms.ValidationError("This account is inactive.")
-            except User.DoesNotExist:
+            self.user_cache = authenticate(
+                self.request,
+                email=email,
+                password=password
+            )
+            if self.user_cache is None:
                 raise forms.ValidationError("Invalid email or password.")
+            elif not self.user_cache.is_active:
+                raise forms.ValidationError("This account is inactive.")
         
         return self.cleaned_data
     
     def get_user(self):
         return getattr(self, 'user_cache', None)
+
+
+class UserImportForm(forms.Form):
+    """Validates one row of a bulk user import"""
+    
+    full_name = forms.CharField(max_length=255)
+    email = forms.EmailField(max_length=254)
+    phone = forms.CharField(max_length=20, required=False)
+    role = forms.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    password = forms.CharField(required=False, strip=False)
+
+
+class UserImportUploadForm(forms.Form):
+    """Admin upload of a CSV or JSON Lines file of users"""
+    
+    FORMAT_CHOICES = [
+        ('', 'Detect from file name'),
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    
+    file = forms.FileField(
+        help_text='Columns: full_name, email, phone, role, password. '
+                  'Users without a password must set one with a password reset.'
+    )
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+
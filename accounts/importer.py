@@ -0,0 +1,237 @@
+"""
+Bulk user import from CSV or JSON Lines
+
+Rows are handled in batches: each batch is validated with UserImportForm,
+checked for existing emails and phone numbers with one query per field,
+has its passwords hashed across a process pool and is inserted with
+bulk_create. Used by the ``import_users`` command and the user admin's
+import page.
+
+The admin imports small uploads within the request. Larger ones would hash
+passwords for longer than a web request may take, so they are saved to
+USER_IMPORT_QUEUE_DIR and imported by ``import_users --queued``, which can
+run as a scheduled task. Each run renames a file before importing it, so
+two runs never import the same upload.
+"""
+import csv
+import json
+import os
+import time
+import uuid
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from cms import counters
+from core.workers import process_pool
+from .forms import UserImportForm
+from .models import User
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, defaulting to CSV"""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or None, parse error or None) from a text stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, 'Expected a JSON object.'
+                continue
+            yield line_no, row, None
+    else:
+        raise ValueError(f'Unknown import format: {fmt}')
+
+
+def queue_dir():
+    return Path(getattr(settings, 'USER_IMPORT_QUEUE_DIR', Path(settings.BASE_DIR) / 'spool' / 'imports'))
+
+
+def queue_upload(chunks, fmt):
+    """Save an uploaded file for ``import_users --queued``, returning its path"""
+    directory = queue_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.{fmt}'
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return path
+
+
+def claim_queued_uploads():
+    """Yield (claimed path, format) for each queued upload, oldest first"""
+    for path in sorted(queue_dir().glob('*.*')):
+        fmt = path.suffix[1:]
+        if fmt not in FORMATS:
+            continue
+        claimed = path.with_name(path.name + '.importing')
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            # Claimed by another run
+            continue
+        yield claimed, fmt
+
+
+class ImportResult:
+    """Outcome of an import: rows created and per-row errors"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return self.created + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def error(self, line_no, message):
+        self.errors.append((line_no, message))
+
+
+class UserImporter:
+    """Validate, hash and insert users in batches"""
+
+    def __init__(self, batch_size=None, workers=None, validate_passwords=True):
+        self.batch_size = batch_size or getattr(settings, 'USER_IMPORT_BATCH_SIZE', 500)
+        self.workers = workers if workers is not None else getattr(settings, 'USER_IMPORT_WORKERS', None) or os.cpu_count()
+        self.validate_passwords = validate_passwords
+
+    def run(self, rows):
+        """Import (line number, row, error) tuples as produced by read_rows"""
+        result = ImportResult()
+        seen_emails, seen_phones = set(), set()
+        executor = None
+        if self.workers > 1:
+            executor = process_pool(self.workers)
+        try:
+            rows = iter(rows)
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch, result, seen_emails, seen_phones, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            result.elapsed = time.monotonic() - result.started
+        result.errors.sort()
+        return result
+
+    def _validate(self, batch, result):
+        """Return (line number, unsaved user, raw password) for each valid row"""
+        valid = []
+        for line_no, row, error in batch:
+            if error:
+                result.error(line_no, error)
+                continue
+            form = UserImportForm(row)
+            if not form.is_valid():
+                result.error(line_no, '; '.join(
+                    f'{field}: {message}' for field, messages in form.errors.items() for message in messages
+                ))
+                continue
+            data = form.cleaned_data
+            user = User(
+                username=data['email'],
+                email=data['email'],
+                full_name=data['full_name'],
+                phone=data['phone'] or None,
+                role=data['role'] or 'PATIENT',
+            )
+            password = data['password'] or None
+            if password and self.validate_passwords:
+                try:
+                    validate_password(password, user)
+                except ValidationError as e:
+                    result.error(line_no, 'password: ' + ' '.join(e.messages))
+                    continue
+            valid.append((line_no, user, password))
+        return valid
+
+    def _drop_duplicates(self, valid, result, seen_emails, seen_phones):
+        """Reject rows clashing with existing users or earlier rows, using one query per field"""
+        emails = {user.email for _, user, _ in valid}
+        phones = {user.phone for _, user, _ in valid if user.phone}
+        existing_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        existing_phones = set(User.objects.filter(phone__in=phones).values_list('phone', flat=True)) if phones else set()
+
+        unique = []
+        for line_no, user, password in valid:
+            if user.email in existing_emails or user.email in seen_emails:
+                result.error(line_no, 'email: A user with this email already exists.')
+            elif user.phone and (user.phone in existing_phones or user.phone in seen_phones):
+                result.error(line_no, 'phone: A user with this phone number already exists.')
+            else:
+                seen_emails.add(user.email)
+                if user.phone:
+                    seen_phones.add(user.phone)
+                unique.append((line_no, user, password))
+        return unique
+
+    def _hash_passwords(self, users, executor):
+        passwords = [password for _, _, password in users]
+        if executor is not None and len(passwords) > 1:
+            chunksize = max(1, len(passwords) // (self.workers * 4))
+            hashes = executor.map(make_password, passwords, chunksize=chunksize)
+        else:
+            hashes = map(make_password, passwords)
+        # make_password(None) gives an unusable password
+        for (_, user, _), encoded in zip(users, hashes):
+            user.password = encoded
+
+    def _import_batch(self, batch, result, seen_emails, seen_phones, executor):
+        users = self._drop_duplicates(self._validate(batch, result), result, seen_emails, seen_phones)
+        if not users:
+            return
+        self._hash_passwords(users, executor)
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user, _ in users])
+            created = [user for _, user, _ in users]
+        except IntegrityError:
+            # A concurrent signup took one of the addresses; find it row by row
+            created = []
+            for line_no, user, _ in users:
+                try:
+                    with transaction.atomic():
+                        User.objects.bulk_create([user])
+                except IntegrityError:
+                    result.error(line_no, 'A user with this email or phone number already exists.')
+                else:
+                    created.append(user)
+
+        # bulk_create sends no post_save, so adjust the counters here
+        counters.increment(counters.USERS_TOTAL, len(created))
+        for role, _ in User.ROLE_CHOICES:
+            counters.increment(counters.user_role_counter(role), sum(1 for user in created if user.role == role))
+        result.created += len(created)
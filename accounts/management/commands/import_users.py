@@ -0,0 +1,83 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.importer import FORMATS, UserImporter, claim_queued_uploads, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import users from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='File to import, or "-" to read from stdin')
+        parser.add_argument(
+            '--queued',
+            action='store_true',
+            help='Import the files queued by the user admin (see USER_IMPORT_QUEUE_DIR)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Input format (default: detected from the file name, else csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows validated and inserted together (default: USER_IMPORT_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processes used to hash passwords (default: USER_IMPORT_WORKERS or CPU count)',
+        )
+        parser.add_argument(
+            '--skip-password-validation',
+            action='store_true',
+            help='Accept passwords that fail AUTH_PASSWORD_VALIDATORS',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if bool(path) == options['queued']:
+            raise CommandError('Give either a file to import or --queued.')
+        importer = UserImporter(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            validate_passwords=not options['skip_password_validation'],
+        )
+
+        if options['queued']:
+            for claimed, fmt in claim_queued_uploads():
+                self.stdout.write(f'Importing {claimed.name}')
+                with open(claimed, encoding='utf-8-sig', newline='') as stream:
+                    result = importer.run(read_rows(stream, fmt))
+                self.report(result)
+                os.remove(claimed)
+            return
+
+        fmt = options['format'] or detect_format(path)
+        if path == '-':
+            result = importer.run(read_rows(sys.stdin, fmt))
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(f'Cannot open {path}: {e}')
+            with stream:
+                result = importer.run(read_rows(stream, fmt))
+        self.report(result)
+
+    def report(self, result):
+        for line_no, message in result.errors:
+            self.stderr.write(f'Line {line_no}: {message}')
+
+        summary = (
+            f'Imported {result.created} users, {len(result.errors)} errors '
+            f'({result.rows} rows in {result.elapsed:.1f}s, {result.rows_per_second:.0f} rows/sec)'
+        )
+        if result.errors:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
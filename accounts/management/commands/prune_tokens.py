@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWT refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tokens deleted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=0,
+            help='Stop after this many batches; 0 means until done (default: 0)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches to let other writers in',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_batches = options['max_batches']
+        cutoff = timezone.now()
+        
+        self.stdout.write(f'Pruning tokens that expired before {cutoff:%Y-%m-%d %H:%M:%S}...')
+        
+        batches = deleted = 0
+        while not max_batches or batches < max_batches:
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lte=cutoff)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Blacklist entries are removed by the cascade
+            _, counts = OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += counts.get(OutstandingToken._meta.label, 0)
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} expired token(s) in {batches} batch(es)!')
+        )
@@ -25,6 +25,13 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Duplicate checks on signup and registration
+            models.Index(fields=['phone'], name='accounts_user_phone_idx'),
+            # Admin changelist ordering, role filter and recent signups
+            models.Index(fields=['-date_joined'], name='accounts_user_joined_idx'),
+            models.Index(fields=['role', '-date_joined'], name='accounts_user_role_joined_idx'),
+        ]
     
     def __str__(self):
         return f"{self.full_name} ({self.email}) - {self.get_role_display()}"
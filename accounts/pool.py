@@ -0,0 +1,67 @@
+"""
+Bounded worker pool for password hashing
+
+PBKDF2 hashing dominates the cost of signup and login. The async auth API
+views run that work here instead of on the event loop or Django's shared
+sync thread, with a cap on queued jobs so a login burst is rejected early
+rather than starving ordinary page traffic.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool already has its maximum number of jobs"""
+
+
+class AuthWorkerPool:
+    """Thread pool that refuses new jobs once running plus queued hits a limit"""
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='auth-worker')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def _call(self, func, args, kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Worker threads never see request_finished, so tidy up here
+            close_old_connections()
+
+    async def run(self, func, *args, **kwargs):
+        """Run func in the pool, raising PoolSaturated if it is full"""
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated()
+        try:
+            future = self._executor.submit(self._call, func, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the job finishes (or is cancelled before it
+        # starts), not when the caller stops waiting: a disconnected client
+        # leaves its job running, and it must still count against the limit
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_auth_pool():
+    """Return the process-wide auth worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AuthWorkerPool(
+                    max_workers=getattr(settings, 'AUTH_POOL_WORKERS', 4),
+                    max_queue=getattr(settings, 'AUTH_POOL_QUEUE', 16),
+                )
+    return _pool
@@ -0,0 +1,139 @@
+"""
+In-memory revocation set for blacklisted refresh tokens
+
+Checking a refresh token against the blacklist is a database lookup on a
+table that grows with every rotation. Each process keeps a Bloom filter of
+the JTIs blacklisted and not yet expired; a token that is not in the filter
+is definitely not blacklisted, so only possible matches reach the database.
+
+The filter is kept current by reading blacklist rows newer than the last
+one seen. A shared-cache hint holding the newest blacklisted id lets a
+process skip that read when nothing has changed, and the read is forced at
+least every JWT_REVOCATION_SYNC_INTERVAL seconds in case a hint was lost.
+The whole filter is rebuilt every JWT_REVOCATION_REBUILD_INTERVAL seconds
+so expired entries age out. One request builds the new filter without
+holding the lock, while the others keep checking against the old one, and
+the result is swapped in at the end. Until a process has built its first
+filter, the other requests check the database as if nothing were cached.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+LATEST_BLACKLISTED_KEY = 'accounts:revocation:latest_id'
+
+# Rows re-read below the watermark on each sync, so blacklist entries that
+# commit out of id order on concurrent databases are still picked up
+SYNC_OVERLAP = 100
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationSet:
+    """Per-process Bloom filter of blacklisted refresh token JTIs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._filter = None
+        self._watermark = 0
+        self._synced_at = 0
+        self._built_at = 0
+
+    def _add_rows(self, rows):
+        for blacklisted_id, jti in rows:
+            self._filter.add(jti)
+            self._watermark = max(self._watermark, blacklisted_id)
+
+    def _needs_rebuild(self):
+        age = time.monotonic() - self._built_at
+        return self._filter is None or age > getattr(settings, 'JWT_REVOCATION_REBUILD_INTERVAL', 600)
+
+    def _rebuild(self):
+        bloom = BloomFilter(getattr(settings, 'JWT_REVOCATION_CAPACITY', 1000000))
+        watermark = BlacklistedToken.objects.aggregate(latest=Max('id'))['latest'] or 0
+        rows = (
+            BlacklistedToken.objects
+            .filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+            .iterator(chunk_size=5000)
+        )
+        for jti in rows:
+            bloom.add(jti)
+
+        with self._lock:
+            self._filter, self._watermark = bloom, watermark
+            self._built_at = time.monotonic()
+            # Rows blacklisted while the filter was being built
+            self._sync()
+        cache.add(LATEST_BLACKLISTED_KEY, watermark, None)
+
+    def _sync(self):
+        rows = (
+            BlacklistedToken.objects
+            .filter(id__gt=self._watermark - SYNC_OVERLAP)
+            .values_list('id', 'token__jti')
+        )
+        self._add_rows(rows)
+        self._synced_at = time.monotonic()
+
+    def might_be_revoked(self, jti):
+        """False means the JTI is definitely not blacklisted"""
+        # Only one thread rebuilds; the rest carry on with the current filter
+        if self._needs_rebuild() and self._rebuild_lock.acquire(blocking=False):
+            try:
+                if self._needs_rebuild():
+                    self._rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+        with self._lock:
+            if self._filter is None:
+                # The first filter is still being built
+                return True
+            latest = cache.get(LATEST_BLACKLISTED_KEY)
+            if (
+                latest is None
+                or latest > self._watermark
+                or time.monotonic() - self._synced_at > getattr(settings, 'JWT_REVOCATION_SYNC_INTERVAL', 5)
+            ):
+                self._sync()
+            return jti in self._filter
+
+    def add(self, jti, blacklisted_id):
+        """Record a token blacklisted by this process and hint the others"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        if (cache.get(LATEST_BLACKLISTED_KEY) or 0) < blacklisted_id:
+            cache.set(LATEST_BLACKLISTED_KEY, blacklisted_id, None)
+
+
+revocation_set = RevocationSet()
@@ -38,10 +38,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Use email as username
         validated_data['username'] = validated_data['email']
         
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        # Hash and insert in a single write
+        return User.objects.create_user(password=password, **validated_data)
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -54,20 +52,16 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if email and password:
-            try:
-                user_obj = User.objects.get(email=email)
-                user = authenticate(username=user_obj.username, password=password)
-                
-                if not user:
-                    raise serializers.ValidationError('Invalid email or password.')
-                
-                if not user.is_active:
-                    raise serializers.ValidationError('User account is disabled.')
-                
-                attrs['user'] = user
-                return attrs
-            except User.DoesNotExist:
+            user = authenticate(self.context.get('request'), email=email, password=password)
+            
+            if not user:
                 raise serializers.ValidationError('Invalid email or password.')
+            
+            if not user.is_active:
+                raise serializers.ValidationError('User account is disabled.')
+            
+            attrs['user'] = user
+            return attrs
         else:
             raise serializers.ValidationError('Must include email and password.')
 
@@ -0,0 +1,54 @@
+"""
+Session engine for dashboard traffic
+
+A cached_db store (reads served from the cache, writes go through to the
+database) that additionally skips the write when a request marked the
+session modified without actually changing its contents, and clears
+expired sessions in bounded batches.
+
+Use with a cache shared by all workers (SESSION_CACHE_ALIAS); a per-process
+local-memory cache is only safe when running a single process.
+"""
+import hashlib
+
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBSessionStore
+from django.utils import timezone
+
+CLEAR_EXPIRED_BATCH_SIZE = 1000
+
+
+class SessionStore(CachedDBSessionStore):
+
+    def _fingerprint(self, session_dict):
+        return hashlib.sha1(self.serializer().dumps(session_dict)).hexdigest()
+
+    def load(self):
+        data = super().load()
+        self._loaded_fingerprint = self._fingerprint(data)
+        return data
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and self.session_key is not None
+            and hasattr(self, '_session_cache')
+            and getattr(self, '_loaded_fingerprint', None) == self._fingerprint(self._session_cache)
+        ):
+            # Marked modified, but the contents match what was loaded
+            return
+        super().save(must_create=must_create)
+        self._loaded_fingerprint = self._fingerprint(self._get_session(no_load=must_create))
+
+    @classmethod
+    def clear_expired(cls):
+        # Delete in batches so clearsessions never holds a long write lock
+        model = cls.get_model_class()
+        while True:
+            keys = list(
+                model.objects
+                .filter(expire_date__lt=timezone.now())
+                .values_list('session_key', flat=True)[:CLEAR_EXPIRED_BATCH_SIZE]
+            )
+            if not keys:
+                break
+            model.objects.filter(session_key__in=keys).delete()
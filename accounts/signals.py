@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .models import User
+from .revocation import revocation_set
+from .tokens import invalidate_user_state
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_user_state(instance.pk)
+
+
+post_save.connect(user_changed, sender=User, dispatch_uid='accounts_user_state_saved')
+post_delete.connect(user_changed, sender=User, dispatch_uid='accounts_user_state_deleted')
+
+
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        revocation_set.add(instance.token.jti, instance.pk)
+
+
+post_save.connect(token_blacklisted, sender=BlacklistedToken, dispatch_uid='accounts_token_blacklisted')
@@ -0,0 +1,142 @@
+import asyncio
+import io
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import User
+from .pool import AuthWorkerPool, PoolSaturated
+from .revocation import RevocationSet
+from .tokens import ClaimsRefreshToken
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+class UserIndexTests(TestCase):
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_phone_duplicate_check(self):
+        self.assertUsesIndex(User.objects.filter(phone='+254700000001'), 'accounts_user_phone_idx')
+
+    def test_recent_signups(self):
+        self.assertUsesIndex(User.objects.order_by('-date_joined'), 'accounts_user_joined_idx')
+
+    def test_recent_signups_by_role(self):
+        self.assertUsesIndex(
+            User.objects.filter(role='PATIENT').order_by('-date_joined'),
+            'accounts_user_role_joined_idx',
+        )
+
+
+class AuthWorkerPoolTests(SimpleTestCase):
+
+    def test_cancelled_caller_keeps_its_slot_until_the_job_ends(self):
+        pool = AuthWorkerPool(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            waiter = asyncio.ensure_future(pool.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            # The job is still running, so there is no room for another
+            with self.assertRaises(PoolSaturated):
+                await pool.run(lambda: None)
+            release.set()
+            await asyncio.sleep(0.05)
+            self.assertEqual(await pool.run(lambda: 'done'), 'done')
+
+        asyncio.run(scenario())
+
+
+class AdminUserImportTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue_dir = directory.name
+        import_settings = override_settings(USER_IMPORT_ADMIN_MAX_ROWS=2, USER_IMPORT_QUEUE_DIR=directory.name)
+        import_settings.enable()
+        self.addCleanup(import_settings.disable)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin-password')
+        self.client.force_login(admin)
+
+    def upload(self, count):
+        rows = ''.join(f'Patient {i},patient{i}@example.com,PATIENT\n' for i in range(count))
+        upload = SimpleUploadedFile('users.csv', f'full_name,email,role\n{rows}'.encode())
+        return self.client.post(reverse('admin:accounts_user_import'), {'file': upload})
+
+    def test_small_upload_is_imported_in_the_request(self):
+        self.assertEqual(self.upload(2).status_code, 200)
+        self.assertEqual(User.objects.filter(email__startswith='patient').count(), 2)
+        self.assertEqual(os.listdir(self.queue_dir), [])
+
+    def test_large_upload_is_queued_for_the_command(self):
+        self.assertEqual(self.upload(3).status_code, 200)
+        self.assertEqual(User.objects.filter(email__startswith='patient').count(), 0)
+        self.assertEqual(len(os.listdir(self.queue_dir)), 1)
+
+        call_command('import_users', queued=True, workers=1, stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(email__startswith='patient').count(), 3)
+        self.assertEqual(os.listdir(self.queue_dir), [])
+
+
+@override_settings(JWT_REVOCATION_CAPACITY=1000)
+class RevocationSetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('patient', 'patient@example.com', 'x')
+        self.token = ClaimsRefreshToken.for_user(user)
+        self.token.blacklist()
+        self.revoked = RevocationSet()
+
+    def test_blacklisted_tokens_might_be_revoked(self):
+        self.assertTrue(self.revoked.might_be_revoked(self.token['jti']))
+        self.assertFalse(self.revoked.might_be_revoked('never-issued'))
+
+    def test_checks_do_not_wait_for_a_rebuild_in_progress(self):
+        self.revoked.might_be_revoked('never-issued')
+        self.revoked._built_at = 0
+        with self.revoked._rebuild_lock, mock.patch.object(self.revoked, '_rebuild') as rebuild:
+            self.assertTrue(self.revoked.might_be_revoked(self.token['jti']))
+            self.assertFalse(self.revoked.might_be_revoked('never-issued'))
+        rebuild.assert_not_called()
+
+    def test_database_is_checked_until_the_first_filter_exists(self):
+        with self.revoked._rebuild_lock:
+            self.assertTrue(self.revoked.might_be_revoked('never-issued'))
+
+
+class UserProfileApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            'patient@example.com', 'patient@example.com', 'x',
+            full_name='Pat Ient', phone='+254700000001', role='PATIENT',
+        )
+        access = ClaimsRefreshToken.for_user(user).access_token
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {access}'}
+        self.url = reverse('user_profile_api')
+
+    def test_profile_loads_the_user_row_once(self):
+        # The first request caches the user's claim state
+        self.client.get(self.url, **self.headers)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['phone'], '+254700000001')
+        self.assertEqual(response.json()['full_name'], 'Pat Ient')
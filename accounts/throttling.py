@@ -0,0 +1,29 @@
+"""DRF throttles for the auth API, backed by the shared sliding-window limiter"""
+from rest_framework.throttling import BaseThrottle
+
+from core.ratelimit import check_request
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Throttle by client IP and submitted email using core.ratelimit"""
+    scope = None
+
+    def allow_request(self, request, view):
+        if request.method != 'POST':
+            return True
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if isinstance(email, str):
+            email = email.strip().lower()
+        self.retry_after = check_request(self.scope, request, email)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginRateThrottle(SlidingWindowThrottle):
+    scope = 'login'
+
+
+class SignupRateThrottle(SlidingWindowThrottle):
+    scope = 'signup'
@@ -0,0 +1,59 @@
+"""
+JWT tokens that carry the user's profile claims
+
+Access tokens issued from ClaimsRefreshToken embed the user's email, role,
+is_active and is_verified, so the API can authenticate requests without
+loading the user row (see accounts.authentication). A short-lived cached
+copy of the same values per user is used to notice deactivated or changed
+accounts before the token expires.
+
+Refresh tokens consult the in-memory revocation filter before looking up
+the blacklist table (see accounts.revocation).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+from .revocation import revocation_set
+
+USER_CLAIMS = ('email', 'role', 'is_active', 'is_verified')
+USER_STATE_KEY = 'accounts:user_state:{user_id}'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens include the user's profile claims"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    def check_blacklist(self):
+        # Only tokens the revocation filter cannot rule out hit the database
+        if revocation_set.might_be_revoked(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that checks the blacklist through the revocation filter"""
+    token_class = ClaimsRefreshToken
+
+
+def get_user_state(user_id):
+    """Return the user's current claim values, or None if the user is gone"""
+    key = USER_STATE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values(*USER_CLAIMS).first() or {}
+        cache.set(key, state, getattr(settings, 'JWT_USER_STATE_CACHE_TIMEOUT', 5))
+    return state or None
+
+
+def invalidate_user_state(*user_ids):
+    """Forget cached claim values so the next request re-reads them"""
+    cache.delete_many([USER_STATE_KEY.format(user_id=user_id) for user_id in user_ids])
@@ -6,6 +6,8 @@ from . import views
 api_urlpatterns = [
     path('signup/', views.signup_api, name='signup_api'),
     path('login/', views.login_api, name='login_api'),
+    path('async/signup/', views.signup_api_async, name='signup_api_async'),
+    path('async/login/', views.login_api_async, name='login_api_async'),
     path('logout/', views.logout_api, name='logout_api'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('me/', views.user_profile_api, name='user_profile_api'),
@@ -5,65 +5,135 @@ from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .models import User
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
 from .forms import SignupForm, LoginForm
+from .pool import get_auth_pool, PoolSaturated
+from .tokens import ClaimsRefreshToken
+from .throttling import LoginRateThrottle, SignupRateThrottle
+from core.ratelimit import ratelimit
 import json
 
 
 # API Views
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def signup_api(request):
-    """API endpoint for role-based user registration"""
-    serializer = UserRegistrationSerializer(data=request.data)
+def _signup(data):
+    """Register a user and issue JWT tokens, returning (payload, status)"""
+    serializer = UserRegistrationSerializer(data=data)
     if serializer.is_valid():
-        user = serializer.save()
+        # Create the user and any outstanding-token record together
+        with transaction.atomic():
+            user = serializer.save()
+            
+            # Generate JWT tokens
+            refresh = ClaimsRefreshToken.for_user(user)
+            access_token = refresh.access_token
         
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        access_token = refresh.access_token
-        
-        return Response({
+        return {
             'message': 'User created successfully',
             'user': UserSerializer(user).data,
             'tokens': {
                 'access': str(access_token),
                 'refresh': str(refresh),
             }
-        }, status=status.HTTP_201_CREATED)
+        }, status.HTTP_201_CREATED
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_api(request):
-    """API endpoint for user login with role-based redirect"""
-    serializer = UserLoginSerializer(data=request.data)
+def _login(data, request):
+    """Authenticate a user and issue JWT tokens, returning (payload, status)"""
+    serializer = UserLoginSerializer(data=data, context={'request': request})
     if serializer.is_valid():
         user = serializer.validated_data['user']
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         access_token = refresh.access_token
         
-        return Response({
+        return {
             'message': 'Login successful',
             'user': UserSerializer(user).data,
             'tokens': {
                 'access': str(access_token),
                 'refresh': str(refresh),
             }
-        }, status=status.HTTP_200_OK)
+        }, status.HTTP_200_OK
+    
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([SignupRateThrottle])
+def signup_api(request):
+    """API endpoint for role-based user registration"""
+    payload, status_code = _signup(request.data)
+    return Response(payload, status=status_code)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([LoginRateThrottle])
+def login_api(request):
+    """API endpoint for user login with role-based redirect"""
+    payload, status_code = _login(request.data, request)
+    return Response(payload, status=status_code)
+
+
+# Async API Views (served under ASGI; hashing runs in a bounded worker pool)
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+async def _run_in_auth_pool(request, func, *args):
+    """Run an auth handler in the worker pool and build a JsonResponse"""
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    data = _request_data(request)
+    if not hasattr(data, 'get'):
+        return JsonResponse({'detail': 'Malformed request body.'}, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        payload, status_code = await get_auth_pool().run(func, data, *args)
+    except PoolSaturated:
+        response = JsonResponse(
+            {'detail': 'Server is busy, please retry shortly.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = str(getattr(settings, 'AUTH_POOL_RETRY_AFTER', 1))
+        return response
+    return JsonResponse(payload, status=status_code)
+
+
+@ratelimit('signup')
+async def signup_api_async(request):
+    """Async API endpoint for role-based user registration"""
+    return await _run_in_auth_pool(request, _signup)
+
+
+@ratelimit('login')
+async def login_api_async(request):
+    """Async API endpoint for user login with role-based redirect"""
+    return await _run_in_auth_pool(request, _login, request)
+
+
+# Token-based API clients do not send CSRF tokens (csrf_exempt does not wrap
+# async views before Django 5.0, so mark them directly)
+signup_api_async.csrf_exempt = True
+login_api_async.csrf_exempt = True
 
 
 @api_view(['POST'])
@@ -73,7 +143,7 @@ def logout_api(request):
     try:
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
         
         return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
@@ -85,11 +155,15 @@ def logout_api(request):
 @permission_classes([IsAuthenticated])
 def user_profile_api(request):
     """API endpoint to get current user profile"""
+    # The profile includes fields that are not token claims (username, phone,
+    # full name, join date), so unlike the other token-authenticated
+    # endpoints this one loads the User row: one query per request
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
 
 # HTML Views
+@ratelimit('login')
 def login_view(request):
     """HTML login page with role-based redirect"""
     if request.user.is_authenticated:
@@ -112,6 +186,7 @@ def login_view(request):
     return render(request, 'accounts/login.html', {'form': form})
 
 
+@ratelimit('signup')
 def signup_view(request):
     """HTML signup page with role selection"""
     if request.user.is_authenticated:
@@ -3,7 +3,10 @@ from django.utils.html import format_html
 from django.db.models import Count
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import SiteSettings, HomepageSection, FAQ, LegalDocument, ContactMessage, ServiceFeature
+from django.utils import timezone
+from core.export import export_response, MESSAGE_EXPORT_FIELDS, MESSAGE_FREE_TEXT_FIELDS
+from .models import SiteSettings, HomepageSection, FAQ, LegalDocument, ContactMessage, ServiceFeature, StatCounter
+from . import counters
 
 
 @admin.register(SiteSettings)
@@ -180,19 +183,35 @@ class ContactMessageAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_as_read', 'mark_as_unread']
+    actions = ['mark_as_read', 'mark_as_unread', 'export_csv', 'export_jsonl']
     
     def mark_as_read(self, request, queryset):
         """Bulk mark messages as read"""
-        updated = queryset.update(is_read=True)
+        # queryset.update() bypasses signals, so adjust the counter here
+        updated = queryset.filter(is_read=False).update(is_read=True)
+        counters.increment(counters.MESSAGES_UNREAD, -updated)
         self.message_user(request, f'{updated} messages marked as read.')
     mark_as_read.short_description = "Mark selected messages as read"
     
     def mark_as_unread(self, request, queryset):
         """Bulk mark messages as unread"""
-        updated = queryset.update(is_read=False)
+        updated = queryset.filter(is_read=True).update(is_read=False)
+        counters.increment(counters.MESSAGES_UNREAD, updated)
         self.message_user(request, f'{updated} messages marked as unread.')
     mark_as_unread.short_description = "Mark selected messages as unread"
+    
+    def export_csv(self, request, queryset):
+        """Stream selected messages as CSV"""
+        return export_response(
+            queryset, MESSAGE_EXPORT_FIELDS, 'csv', f'contact-messages-{timezone.now():%Y%m%d}',
+            escape=MESSAGE_FREE_TEXT_FIELDS,
+        )
+    export_csv.short_description = "Export selected messages as CSV"
+    
+    def export_jsonl(self, request, queryset):
+        """Stream selected messages as JSON Lines"""
+        return export_response(queryset, MESSAGE_EXPORT_FIELDS, 'jsonl', f'contact-messages-{timezone.now():%Y%m%d}')
+    export_jsonl.short_description = "Export selected messages as JSON Lines"
 
 
 @admin.register(ServiceFeature)
@@ -213,6 +232,21 @@ class ServiceFeatureAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(StatCounter)
+class StatCounterAdmin(admin.ModelAdmin):
+    """Read-only view of the dashboard statistics counters"""
+    
+    list_display = ('name', 'value')
+    search_fields = ('name',)
+    
+    def has_add_permission(self, request):
+        # Counters are maintained by signals and the recount command
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Custom Admin Dashboard
 class IntimaCareAdminSite(admin.AdminSite):
     """Custom admin site with enhanced dashboard"""
@@ -221,46 +255,60 @@ class IntimaCareAdminSite(admin.AdminSite):
     site_title = "IntimaCare Admin"
     index_title = "IntimaCare Management Dashboard"
     
-    def index(self, request, extra_context=None):
-        """Enhanced admin dashboard with analytics"""
+    dashboard_stats_cache_key = 'cms:admin:dashboard_stats'
+    
+    def get_dashboard_stats(self):
+        """Collect dashboard statistics from counters and cheap queries"""
         from accounts.models import User
         from django.utils import timezone
         from datetime import timedelta
         
-        extra_context = extra_context or {}
-        
-        # User statistics
-        total_users = User.objects.count()
-        patients = User.objects.filter(role='PATIENT').count()
-        clinicians = User.objects.filter(role='CLINICIAN').count()
-        organizations = User.objects.filter(role='ORGANIZATION').count()
+        # User and contact message statistics are maintained incrementally
+        values = counters.get_counters(
+            counters.USERS_TOTAL,
+            counters.user_role_counter('PATIENT'),
+            counters.user_role_counter('CLINICIAN'),
+            counters.user_role_counter('ORGANIZATION'),
+            counters.MESSAGES_UNREAD,
+            counters.MESSAGES_TOTAL,
+        )
+        stats = {
+            'total_users': values[counters.USERS_TOTAL],
+            'patients': values[counters.user_role_counter('PATIENT')],
+            'clinicians': values[counters.user_role_counter('CLINICIAN')],
+            'organizations': values[counters.user_role_counter('ORGANIZATION')],
+            'unread_messages': values[counters.MESSAGES_UNREAD],
+            'total_messages': values[counters.MESSAGES_TOTAL],
+        }
         
         # Recent activity (last 30 days)
         thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_users = User.objects.filter(date_joined__gte=thirty_days_ago).count()
-        
-        # Contact messages
-        unread_messages = ContactMessage.objects.filter(is_read=False).count()
-        total_messages = ContactMessage.objects.count()
+        stats['recent_users'] = User.objects.filter(date_joined__gte=thirty_days_ago).count()
         
         # Content statistics
-        active_homepage_sections = HomepageSection.objects.filter(active=True).count()
-        active_faqs = FAQ.objects.filter(active=True).count()
-        active_services = ServiceFeature.objects.filter(active=True).count()
+        stats['active_homepage_sections'] = HomepageSection.objects.filter(active=True).count()
+        stats['active_faqs'] = FAQ.objects.filter(active=True).count()
+        stats['active_services'] = ServiceFeature.objects.filter(active=True).count()
+        
+        return stats
+    
+    def index(self, request, extra_context=None):
+        """Enhanced admin dashboard with analytics"""
+        from django.conf import settings
+        from django.core.cache import cache
+        
+        extra_context = extra_context or {}
+        
+        # Optionally reuse recent stats; 0 disables caching
+        timeout = getattr(settings, 'ADMIN_DASHBOARD_CACHE_TIMEOUT', 0)
+        dashboard_stats = cache.get(self.dashboard_stats_cache_key) if timeout else None
+        if dashboard_stats is None:
+            dashboard_stats = self.get_dashboard_stats()
+            if timeout:
+                cache.set(self.dashboard_stats_cache_key, dashboard_stats, timeout)
         
         extra_context.update({
-            'dashboard_stats': {
-                'total_users': total_users,
-                'patients': patients,
-                'clinicians': clinicians,
-                'organizations': organizations,
-                'recent_users': recent_users,
-                'unread_messages': unread_messages,
-                'total_messages': total_messages,
-                'active_homepage_sections': active_homepage_sections,
-                'active_faqs': active_faqs,
-                'active_services': active_services,
-            }
+            'dashboard_stats': dashboard_stats
         })
         
         return super().index(request, extra_context)
@@ -279,6 +327,7 @@ admin_site.register(FAQ, FAQAdmin)
 admin_site.register(LegalDocument, LegalDocumentAdmin)
 admin_site.register(ContactMessage, ContactMessageAdmin)
 admin_site.register(ServiceFeature, ServiceFeatureAdmin)
+admin_site.register(StatCounter, StatCounterAdmin)
 
 # Keep the default registrations for compatibility
 admin.site.site_header = "IntimaCare Admin"
@@ -0,0 +1,88 @@
+"""Benchmarks for cms (see core.benchmark)"""
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import User
+from core.benchmark import benchmark, timed
+
+from . import counters
+from .admin import admin_site
+from .models import FAQ, ContactMessage, HomepageSection, ServiceFeature
+
+SEED_BATCH_SIZE = 10000
+ROLES = ('PATIENT', 'CLINICIAN', 'ORGANIZATION')
+
+
+def _seed_users(count):
+    """count users across the roles, joined over the last year"""
+    now = timezone.now()
+    for start in range(0, count, SEED_BATCH_SIZE):
+        User.objects.bulk_create([
+            User(
+                username=f'user{i}', email=f'user{i}@example.com', password='!', full_name=f'User {i}',
+                role=ROLES[i % len(ROLES)], date_joined=now - timedelta(days=i % 365),
+            )
+            for i in range(start, min(start + SEED_BATCH_SIZE, count))
+        ])
+
+
+def _seed_messages(count):
+    ContactMessage.objects.bulk_create([
+        ContactMessage(name=f'Visitor {i}', email=f'visitor{i}@example.com', message='Hello', is_read=bool(i % 3))
+        for i in range(count)
+    ], batch_size=SEED_BATCH_SIZE)
+
+
+def _separate_counts():
+    """The dashboard statistics as one COUNT query each"""
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    return {
+        'total_users': User.objects.count(),
+        'patients': User.objects.filter(role='PATIENT').count(),
+        'clinicians': User.objects.filter(role='CLINICIAN').count(),
+        'organizations': User.objects.filter(role='ORGANIZATION').count(),
+        'recent_users': User.objects.filter(date_joined__gte=thirty_days_ago).count(),
+        'unread_messages': ContactMessage.objects.filter(is_read=False).count(),
+        'total_messages': ContactMessage.objects.count(),
+        'active_homepage_sections': HomepageSection.objects.filter(active=True).count(),
+        'active_faqs': FAQ.objects.filter(active=True).count(),
+        'active_services': ServiceFeature.objects.filter(active=True).count(),
+    }
+
+
+def _table_aggregates():
+    """The dashboard statistics with one conditional aggregate per table"""
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    stats = User.objects.aggregate(
+        total_users=Count('id'),
+        patients=Count('id', filter=Q(role='PATIENT')),
+        clinicians=Count('id', filter=Q(role='CLINICIAN')),
+        organizations=Count('id', filter=Q(role='ORGANIZATION')),
+        recent_users=Count('id', filter=Q(date_joined__gte=thirty_days_ago)),
+    )
+    stats.update(ContactMessage.objects.aggregate(
+        unread_messages=Count('id', filter=Q(is_read=False)),
+        total_messages=Count('id'),
+    ))
+    stats['active_homepage_sections'] = HomepageSection.objects.filter(active=True).count()
+    stats['active_faqs'] = FAQ.objects.filter(active=True).count()
+    stats['active_services'] = ServiceFeature.objects.filter(active=True).count()
+    return stats
+
+
+@benchmark(size=500000)
+def admin_dashboard_stats(size):
+    """Admin dashboard statistics over size users, uncached"""
+    _seed_users(size)
+    _seed_messages(size // 10)
+    counters.recount()
+
+    expected = _separate_counts()
+    assert _table_aggregates() == expected
+    assert admin_site.get_dashboard_stats() == expected
+
+    yield 'ten COUNT queries', timed(_separate_counts, 20)
+    yield 'one aggregate per table', timed(_table_aggregates, 20)
+    yield 'counters plus recent signups (current)', timed(admin_site.get_dashboard_stats, 20)
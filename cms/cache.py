@@ -0,0 +1,282 @@
+"""
+Caching helpers for CMS content
+
+Every CMS model has a version key in the shared cache that is bumped when a
+row of that model is saved or deleted. Cached data that depends on a model
+embeds its current version in the cache key, so an admin edit invalidates
+exactly the entries built from that model on every worker at once.
+
+SiteSettings is a singleton read on every rendered page, so it is
+additionally memoised per process and only reloaded when its version moves.
+
+The same versions drive HTTP validators for public pages: the ETag is a
+digest of the versions a page depends on and Last-Modified is the latest
+change time of those models, computed once per version.
+"""
+import asyncio
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils import timezone, translation
+from django.views.decorators.http import condition
+
+from .models import SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature
+
+MODEL_VERSION_KEY = 'cms:version:{label}'
+SITE_SETTINGS_KEY = 'cms:site_settings:{version}'
+PAGE_CACHE_KEY = 'cms:page:{digest}'
+CHANGED_AT_KEY = 'cms:changed_at:{label}'
+LAST_MODIFIED_KEY = 'cms:last_modified:{label}:{version}'
+
+# Timestamp column used to work out when a model's rows last changed
+TIMESTAMP_FIELDS = {
+    HomepageSection: 'updated_at',
+    FAQ: 'updated_at',
+    LegalDocument: 'last_updated',
+    ServiceFeature: 'created_at',
+}
+
+# Stored in the shared cache when no SiteSettings row exists yet, so a fresh
+# install does not query the database on every request either
+_MISSING = 'missing'
+
+# (version, settings) for this process, replaced as a single tuple so readers
+# on other threads never see a half-updated pair
+_local_settings = (None, None)
+
+
+def _version_key(model):
+    return MODEL_VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def get_model_versions(*models):
+    """Return the current version of each model, creating missing ones"""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """Publish a new version for a model, invalidating dependent entries"""
+    cache.set_many({
+        _version_key(model): uuid.uuid4().hex,
+        CHANGED_AT_KEY.format(label=model._meta.label_lower): timezone.now(),
+    }, None)
+
+
+def _latest_change(model):
+    """Latest row timestamp or recorded save/delete time, whichever is later"""
+    times = [cache.get(CHANGED_AT_KEY.format(label=model._meta.label_lower))]
+    field = TIMESTAMP_FIELDS.get(model)
+    if field:
+        times.append(model.objects.aggregate(latest=Max(field))['latest'])
+    times = [value for value in times if value is not None]
+    return max(times) if times else None
+
+
+def get_last_modified(*models):
+    """Return when any of the given models last changed, or None if unknown"""
+    latest = None
+    for model, version in zip(models, get_model_versions(*models)):
+        key = LAST_MODIFIED_KEY.format(label=model._meta.label_lower, version=version)
+        changed = cache.get(key)
+        if changed is None:
+            # An empty table is remembered too, or every request would
+            # aggregate it again until its first edit
+            changed = _latest_change(model)
+            cache.set(key, changed if changed is not None else _MISSING, None)
+        if changed is None or changed == _MISSING:
+            continue
+        if latest is None or changed > latest:
+            latest = changed
+    return latest
+
+
+def get_site_settings_version():
+    """Return the current SiteSettings version"""
+    return get_model_versions(SiteSettings)[0]
+
+
+def get_site_settings():
+    """Return the SiteSettings singleton, hitting the database only on a miss"""
+    global _local_settings
+
+    version = get_site_settings_version()
+    local_version, settings = _local_settings
+    if version is not None and local_version == version:
+        return settings
+
+    key = SITE_SETTINGS_KEY.format(version=version)
+    settings = cache.get(key)
+    if settings is None:
+        settings = SiteSettings.objects.first()
+        cache.set(key, settings if settings is not None else _MISSING, None)
+    elif settings == _MISSING:
+        settings = None
+
+    _local_settings = (version, settings)
+    return settings
+
+
+async def aget_site_settings():
+    """Async variant of get_site_settings; only a miss runs in a worker thread"""
+    local_version, settings = _local_settings
+    if local_version is not None:
+        version = await cache.aget(_version_key(SiteSettings))
+        if version == local_version:
+            return settings
+    return await sync_to_async(get_site_settings)()
+
+
+def invalidate_model_cache(sender, **kwargs):
+    """Signal receiver: bump the version of the saved or deleted model"""
+    global _local_settings
+
+    bump_model_version(sender)
+    if sender is SiteSettings:
+        _local_settings = (None, None)
+
+
+def _page_cache_key(request, models):
+    versions = get_model_versions(SiteSettings, *models)
+    raw = '|'.join([request.path, translation.get_language() or ''] + versions)
+    return PAGE_CACHE_KEY.format(digest=hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def _has_pending_messages(request):
+    # Pending flash messages must be shown, not swallowed by a cached page
+    return CookieStorage.cookie_name in request.COOKIES
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if _has_pending_messages(request):
+        return False
+    return not request.user.is_authenticated
+
+
+def _lookup_page(request, models):
+    """Return (key, cached) for a cacheable request, or (None, None)"""
+    if not _is_cacheable_request(request):
+        return None, None
+    key = _page_cache_key(request, models)
+    return key, cache.get(key)
+
+
+def _store_page(request, key, response):
+    messages = getattr(request, '_messages', None)
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not (messages is not None and messages.used)
+    ):
+        timeout = getattr(django_settings, 'CMS_PAGE_CACHE_TIMEOUT', 600)
+        cache.set(key, (response.content, response['Content-Type']), timeout)
+
+
+def cms_page_cache(*models):
+    """
+    Cache the full response of a public view for anonymous visitors.
+
+    The cache key combines the request path, the active language and the
+    versions of SiteSettings plus the given CMS models, so saving or deleting
+    one of those models only purges the pages that render it.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                key, cached = await sync_to_async(_lookup_page)(request, models)
+                if cached is not None:
+                    content, content_type = cached
+                    return HttpResponse(content, content_type=content_type)
+
+                response = await view_func(request, *args, **kwargs)
+                if key is not None:
+                    await sync_to_async(_store_page)(request, key, response)
+                return response
+            return _wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            key, cached = _lookup_page(request, models)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if key is not None:
+                _store_page(request, key, response)
+            return response
+        return _wrapped_view
+    return decorator
+
+
+def _conditional_probe(request, *args, **kwargs):
+    # Stands in for an async view so condition() can run in a worker thread
+    response = HttpResponse()
+    response.is_conditional_probe = True
+    return response
+
+
+def cms_conditional(*models):
+    """
+    Answer conditional GETs for a public view before it renders.
+
+    The ETag digests the path, language, authentication state and the
+    versions of SiteSettings plus the given models; Last-Modified is only
+    sent to anonymous visitors because the navigation differs once logged in.
+    """
+    models = (SiteSettings,) + models
+
+    def etag_func(request, *args, **kwargs):
+        if _has_pending_messages(request):
+            return None
+        state = 'user' if request.user.is_authenticated else 'anonymous'
+        raw = '|'.join(
+            [request.path, translation.get_language() or '', state]
+            + get_model_versions(*models)
+        )
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if _has_pending_messages(request) or request.user.is_authenticated:
+            return None
+        return get_last_modified(*models)
+
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    def decorator(view_func):
+        if not asyncio.iscoroutinefunction(view_func):
+            return conditional(view_func)
+
+        probe = sync_to_async(conditional(_conditional_probe))
+
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            # Validators may need the session and database, so compute them
+            # in one thread hop and only render when the client needs a body
+            result = await probe(request, *args, **kwargs)
+            if not getattr(result, 'is_conditional_probe', False):
+                return result
+
+            response = await view_func(request, *args, **kwargs)
+            for header in ('ETag', 'Last-Modified'):
+                if header in result and not response.has_header(header):
+                    response[header] = result[header]
+            return response
+        return _wrapped_view
+    return decorator
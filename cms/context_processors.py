@@ -1,10 +1,9 @@
-from .models import SiteSettings
+from .cache import get_site_settings
 
 
 def site_settings(request):
     """Make site settings available in all templates"""
-    try:
-        settings = SiteSettings.objects.first()
-        return {'site_settings': settings}
-    except SiteSettings.DoesNotExist:
-        return {'site_settings': None}
+    # Async views resolve the settings up front (see cms.cache.aget_site_settings)
+    if hasattr(request, 'site_settings'):
+        return {'site_settings': request.site_settings}
+    return {'site_settings': get_site_settings()}
@@ -0,0 +1,73 @@
+"""
+Incrementally maintained statistics counters
+
+Counting users by role or contact messages by read state is a full table
+scan, so the totals are kept in StatCounter rows instead. Signal handlers
+in cms.signals keep them current on save/delete, bulk updates adjust them
+explicitly, and the ``recount`` command rebuilds them if they drift.
+"""
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Q
+
+from .models import StatCounter, ContactMessage
+
+USERS_TOTAL = 'users.total'
+USERS_ROLE = 'users.role.{role}'
+MESSAGES_TOTAL = 'messages.total'
+MESSAGES_UNREAD = 'messages.unread'
+
+
+def user_role_counter(role):
+    return USERS_ROLE.format(role=role)
+
+
+def increment(name, delta=1):
+    """Atomically add delta to a counter, creating it if needed"""
+    if not delta:
+        return
+    if not StatCounter.objects.filter(name=name).update(value=F('value') + delta):
+        with transaction.atomic():
+            counter, _ = StatCounter.objects.select_for_update().get_or_create(name=name)
+            counter.value = F('value') + delta
+            counter.save(update_fields=['value'])
+
+
+def get_counters(*names):
+    """Return a dict of counter values, defaulting missing counters to 0"""
+    values = dict(StatCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    return {name: values.get(name, 0) for name in names}
+
+
+def compute_counters():
+    """Count every tracked statistic from the source tables"""
+    from accounts.models import User
+
+    # Counts are written back to the primary, so they must not come from a
+    # replica that may be behind it
+    user_stats = User.objects.using(DEFAULT_DB_ALIAS).aggregate(
+        total=Count('id'),
+        **{
+            role: Count('id', filter=Q(role=role))
+            for role, _ in User.ROLE_CHOICES
+        }
+    )
+    message_stats = ContactMessage.objects.using(DEFAULT_DB_ALIAS).aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+    )
+
+    counters = {USERS_TOTAL: user_stats.pop('total')}
+    for role, value in user_stats.items():
+        counters[user_role_counter(role)] = value
+    counters[MESSAGES_TOTAL] = message_stats['total']
+    counters[MESSAGES_UNREAD] = message_stats['unread']
+    return counters
+
+
+@transaction.atomic
+def recount():
+    """Rebuild every counter from the source tables and return the values"""
+    counters = compute_counters()
+    for name, value in counters.items():
+        StatCounter.objects.update_or_create(name=name, defaults={'value': value})
+    return counters
@@ -0,0 +1,134 @@
+"""
+Responsive derivatives of uploaded CMS images
+
+Admins upload images at whatever size they have, so each upload is also
+stored as WebP and JPEG (PNG for images with transparency) copies at a
+few widths. The result is kept on the model as a small dict, with the
+source dimensions, which the ``responsive_image`` template tag turns into
+``srcset``, ``sizes``, ``width`` and ``height`` attributes:
+
+    {
+        'source': 'homepage_sections/hero.jpg',
+        'width': 2400, 'height': 1600,
+        'variants': {
+            'webp': [[480, 320, 'homepage_sections/variants/1a2b-480w.webp'], ...],
+            'jpeg': [[480, 320, 'homepage_sections/variants/1a2b-480w.jpeg'], ...],
+        },
+    }
+
+Variant names include a digest of the source bytes, so identical uploads
+share their derivatives. Files Pillow cannot read (SVG logos) get no
+variants and are served as uploaded.
+"""
+import hashlib
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Widths generated for each image field; widths at or above the source
+# width are skipped
+HOMEPAGE_IMAGE_WIDTHS = (480, 800, 1200, 1600)
+LOGO_WIDTHS = (160, 320, 480)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def variants_stale(fieldfile, info):
+    """Whether the stored variants no longer describe the field's file"""
+    if not fieldfile:
+        return bool(info)
+    if not fieldfile._committed:
+        # A new upload that has not been written to storage yet
+        return True
+    return (info or {}).get('source') != fieldfile.name
+
+
+def _save_variant(image, name, fmt, storage):
+    if storage.exists(name):
+        return name
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif fmt == 'jpeg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def render_variants(source, directory, widths, storage=None):
+    """
+    Write resized copies of the image in the file object source to
+    directory/variants/ and return their description, or {} if source is
+    not an image Pillow can read.
+    """
+    storage = storage or default_storage
+    data = source.read()
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        return {}
+    source_format = image.format
+
+    # Honour camera rotation so width and height match what is displayed
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    fallback = 'png' if has_alpha else 'jpeg'
+
+    digest = hashlib.md5(data).hexdigest()[:12]
+    width, height = image.size
+    variants = {'webp': [], fallback: []}
+    for target in sorted(set(widths)):
+        if target >= width:
+            break
+        target_height = max(1, round(height * target / width))
+        resized = image.resize((target, target_height), Image.LANCZOS)
+        for fmt in variants:
+            name = posixpath.join(directory, 'variants', f'{digest}-{target}w.{fmt}')
+            variants[fmt].append([target, target_height, _save_variant(resized, name, fmt, storage)])
+
+    # The full-size image in WebP too, unless the upload already is one
+    if source_format != 'WEBP':
+        name = posixpath.join(directory, 'variants', f'{digest}-{width}w.webp')
+        variants['webp'].append([width, height, _save_variant(image, name, 'webp', storage)])
+
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+def build_variants(fieldfile, widths):
+    """Render variants for an image field's stored file"""
+    directory = posixpath.dirname(fieldfile.name)
+    fieldfile.open('rb')
+    try:
+        info = render_variants(fieldfile, directory, widths, fieldfile.storage)
+    finally:
+        fieldfile.close()
+    info['source'] = fieldfile.name
+    return info
+
+
+def refresh_variants(instance, field_name, widths):
+    """
+    Rebuild instance.<field_name>_variants if the field's file has changed.
+    Returns whether the variants were rebuilt.
+    """
+    fieldfile = getattr(instance, field_name)
+    attname = f'{field_name}_variants'
+    if not variants_stale(fieldfile, getattr(instance, attname)):
+        return False
+
+    if not fieldfile:
+        setattr(instance, attname, {})
+        return True
+    if not fieldfile._committed:
+        # Write the upload now, as FileField.pre_save would, so the
+        # variants can record its final name
+        fieldfile.save(fieldfile.name, fieldfile.file, save=False)
+    setattr(instance, attname, build_variants(fieldfile, widths))
+    return True
@@ -0,0 +1,79 @@
+import os
+import posixpath
+from concurrent.futures import as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from cms.cache import bump_model_version
+from cms.images import HOMEPAGE_IMAGE_WIDTHS, LOGO_WIDTHS, render_variants, variants_stale
+from cms.models import SiteSettings, HomepageSection
+from core.workers import process_pool
+
+# (model, image field, widths); variants are stored in <field>_variants
+IMAGE_FIELDS = (
+    (SiteSettings, 'logo', LOGO_WIDTHS),
+    (HomepageSection, 'image', HOMEPAGE_IMAGE_WIDTHS),
+)
+
+
+def _render(name, widths):
+    """Render variants for a stored file; runs in a worker process"""
+    with default_storage.open(name, 'rb') as f:
+        info = render_variants(f, posixpath.dirname(name), widths)
+    info['source'] = name
+    return info
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image variants for existing CMS uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants even if they are up to date',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Processes used to resize images (default: CPU count)',
+        )
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, field_name, widths in IMAGE_FIELDS:
+            attname = f'{field_name}_variants'
+            for obj in model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}):
+                fieldfile = getattr(obj, field_name)
+                if options['force'] or variants_stale(fieldfile, getattr(obj, attname)):
+                    jobs.append((model, obj.pk, attname, fieldfile.name, widths))
+
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS('All image variants are up to date!'))
+            return
+
+        self.stdout.write(f'Generating variants for {len(jobs)} images...')
+
+        done = 0
+        changed = set()
+        with process_pool(options['workers']) as executor:
+            futures = {executor.submit(_render, name, widths): (model, pk, attname, name) for model, pk, attname, name, widths in jobs}
+            for future in as_completed(futures):
+                model, pk, attname, name = futures[future]
+                try:
+                    info = future.result()
+                except Exception as e:
+                    self.stderr.write(f'{name}: {e}')
+                    continue
+                # update() skips save(), which would regenerate the variants
+                model.objects.filter(pk=pk).update(**{attname: info})
+                changed.add(model)
+                done += 1
+                self.stdout.write(f'  {name}: {sum(len(v) for v in info.get("variants", {}).values())} variants')
+
+        # Cached pages still reference the old image markup
+        for model in changed:
+            bump_model_version(model)
+
+        self.stdout.write(self.style.SUCCESS(f'Generated variants for {done} of {len(jobs)} images!'))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from cms.spool import drain_contact_spool, get_contact_spool
+
+
+class Command(BaseCommand):
+    help = 'Insert spooled contact form submissions in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Messages inserted per transaction (default: CONTACT_SPOOL_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the spool for new messages',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls when the spool is empty (with --loop)',
+        )
+
+    def handle(self, *args, **options):
+        spool = get_contact_spool()
+        batch_size = options['batch_size']
+        total = 0
+
+        try:
+            while True:
+                close_old_connections()
+                created = drain_contact_spool(spool, batch_size)
+                total += created
+                if created:
+                    self.stdout.write(f'Inserted {created} messages')
+                elif len(spool):
+                    # Whole batch was already inserted before a restart
+                    continue
+                elif options['loop']:
+                    time.sleep(options['interval'])
+                else:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Done! Inserted {total} messages.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from cms.counters import recount
+from cms.models import StatCounter
+
+
+class Command(BaseCommand):
+    help = 'Rebuild dashboard statistics counters from the source tables'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recounting statistics...')
+        
+        previous = dict(StatCounter.objects.using(DEFAULT_DB_ALIAS).values_list('name', 'value'))
+        for name, value in recount().items():
+            drift = value - previous.get(name, 0)
+            if drift:
+                self.stdout.write(self.style.WARNING(f'~ {name}: {previous.get(name, 0)} -> {value} ({drift:+d})'))
+            else:
+                self.stdout.write(f'+ {name}: {value}')
+        
+        self.stdout.write(self.style.SUCCESS('Statistics counters reconciled!'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from cms.models import LegalDocument
+
+
+class Command(BaseCommand):
+    help = 'Pre-render legal document markdown to stored HTML'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render every document even if its content is unchanged',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rendering legal documents...')
+        
+        rendered = 0
+        for document in LegalDocument.objects.all():
+            if options['force']:
+                document.content_hash = ''
+            if document.render_content():
+                # Update directly so last_updated (shown to visitors) is untouched
+                LegalDocument.objects.filter(pk=document.pk).update(
+                    content_html=document.content_html,
+                    content_hash=document.content_hash,
+                )
+                rendered += 1
+                self.stdout.write(f'+ Rendered: {document.title}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rendered {rendered} legal document(s)!')
+        )
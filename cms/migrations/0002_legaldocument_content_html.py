@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legaldocument',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='legaldocument',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False, help_text='Rendered HTML of the content'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    ContactMessage = apps.get_model('cms', 'ContactMessage')
+    StatCounter = apps.get_model('cms', 'StatCounter')
+    db_alias = schema_editor.connection.alias
+
+    counters = {'users.total': User.objects.using(db_alias).count()}
+    for role in ('PATIENT', 'CLINICIAN', 'ORGANIZATION'):
+        counters[f'users.role.{role}'] = User.objects.using(db_alias).filter(role=role).count()
+    messages = ContactMessage.objects.using(db_alias).aggregate(
+        total=Count('id'),
+        unread=Count('id', filter=Q(is_read=False)),
+    )
+    counters['messages.total'] = messages['total']
+    counters['messages.unread'] = messages['unread']
+
+    StatCounter.objects.using(db_alias).bulk_create(
+        StatCounter(name=name, value=value) for name, value in counters.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_phone'),
+        ('cms', '0002_legaldocument_content_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistic Counter',
+                'verbose_name_plural': 'Statistic Counters',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
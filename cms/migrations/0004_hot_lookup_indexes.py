@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0003_statcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(condition=models.Q(('active', True)), fields=['order', 'created_at'], name='cms_faq_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homepagesection',
+            index=models.Index(condition=models.Q(('active', True)), fields=['order', 'created_at'], name='cms_section_active_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicefeature',
+            index=models.Index(condition=models.Q(('active', True)), fields=['order', 'name'], name='cms_service_active_order_idx'),
+        ),
+    ]
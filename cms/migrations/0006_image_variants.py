@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0005_contactmessage_spool_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homepagesection',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the image'),
+        ),
+        migrations.AddField(
+            model_name='sitesettings',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the logo'),
+        ),
+    ]
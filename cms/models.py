@@ -1,5 +1,9 @@
 from django.db import models
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from .images import HOMEPAGE_IMAGE_WIDTHS, LOGO_WIDTHS, refresh_variants
+from .utils import content_hash, render_markdown
 
 
 class SiteSettings(models.Model):
@@ -11,6 +15,7 @@ class SiteSettings(models.Model):
         null=True,
         validators=[FileExtensionValidator(allowed_extensions=['png', 'jpg', 'jpeg', 'svg'])]
     )
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the logo")
     primary_color = models.CharField(max_length=7, default="#FFC300", help_text="Hex color code")
     secondary_color = models.CharField(max_length=7, default="#000000", help_text="Hex color code")
     tagline = models.CharField(max_length=200, default="Your trusted telehealth platform")
@@ -32,6 +37,10 @@ class SiteSettings(models.Model):
         # Ensure only one instance exists
         if not self.pk and SiteSettings.objects.exists():
             raise ValueError('Only one SiteSettings instance is allowed')
+        if refresh_variants(self, 'logo', LOGO_WIDTHS):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'logo' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'logo_variants'}
         return super().save(*args, **kwargs)
 
 
@@ -46,6 +55,7 @@ class HomepageSection(models.Model):
         null=True,
         validators=[FileExtensionValidator(allowed_extensions=['png', 'jpg', 'jpeg', 'webp'])]
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the image")
     active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0, help_text="Order of appearance on homepage")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -55,9 +65,20 @@ class HomepageSection(models.Model):
         ordering = ['order', 'created_at']
         verbose_name = "Homepage Section"
         verbose_name_plural = "Homepage Sections"
+        indexes = [
+            # Active sections in display order for the homepage
+            models.Index(fields=['order', 'created_at'], name='cms_section_active_order_idx', condition=models.Q(active=True)),
+        ]
     
     def __str__(self):
         return self.title
+    
+    def save(self, *args, **kwargs):
+        if refresh_variants(self, 'image', HOMEPAGE_IMAGE_WIDTHS):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'image' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'image_variants'}
+        return super().save(*args, **kwargs)
 
 
 class FAQ(models.Model):
@@ -73,6 +94,10 @@ class FAQ(models.Model):
         ordering = ['order', 'created_at']
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
+        indexes = [
+            # Active FAQs in display order for the FAQ page
+            models.Index(fields=['order', 'created_at'], name='cms_faq_active_order_idx', condition=models.Q(active=True)),
+        ]
     
     def __str__(self):
         return self.question
@@ -91,6 +116,8 @@ class LegalDocument(models.Model):
     slug = models.SlugField(unique=True, help_text="URL slug for the document")
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPES, unique=True)
     content = models.TextField(help_text="Full content of the legal document")
+    content_html = models.TextField(blank=True, editable=False, help_text="Rendered HTML of the content")
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -101,6 +128,27 @@ class LegalDocument(models.Model):
     
     def __str__(self):
         return self.title
+    
+    def render_content(self):
+        """Refresh the stored HTML if the markdown content has changed"""
+        digest = content_hash(self.content)
+        if digest != self.content_hash or not self.content_html:
+            self.content_html = render_markdown(self.content)
+            self.content_hash = digest
+            return True
+        return False
+    
+    def save(self, *args, **kwargs):
+        self.render_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'content_html', 'content_hash'}
+        return super().save(*args, **kwargs)
+    
+    @property
+    def rendered_content(self):
+        """Pre-rendered HTML of the document content"""
+        return mark_safe(self.content_html)
 
 
 class ContactMessage(models.Model):
@@ -109,8 +157,11 @@ class ContactMessage(models.Model):
     email = models.EmailField()
     subject = models.CharField(max_length=200, blank=True)
     message = models.TextField()
-    date_created = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so spooled messages keep their submission time
+    date_created = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
+    # Key of the spool entry this message was inserted from (see cms.spool)
+    spool_key = models.UUIDField(null=True, blank=True, unique=True, editable=False)
     
     class Meta:
         ordering = ['-date_created']
@@ -134,6 +185,24 @@ class ServiceFeature(models.Model):
         ordering = ['order', 'name']
         verbose_name = "Service Feature"
         verbose_name_plural = "Service Features"
+        indexes = [
+            # Active features in display order for the services page
+            models.Index(fields=['order', 'name'], name='cms_service_active_order_idx', condition=models.Q(active=True)),
+        ]
     
     def __str__(self):
         return self.name
+
+
+class StatCounter(models.Model):
+    """Incrementally maintained counts used by dashboard statistics"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Statistic Counter"
+        verbose_name_plural = "Statistic Counters"
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
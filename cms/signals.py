@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models.signals import post_init, post_save, post_delete
+
+from . import counters
+from .cache import invalidate_model_cache
+from .models import SiteSettings, HomepageSection, FAQ, LegalDocument, ContactMessage, ServiceFeature
+
+
+# Models rendered on public pages; ContactMessage is write-only from the site
+for model in (SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature):
+    post_save.connect(invalidate_model_cache, sender=model, dispatch_uid=f'cms_{model._meta.model_name}_saved')
+    post_delete.connect(invalidate_model_cache, sender=model, dispatch_uid=f'cms_{model._meta.model_name}_deleted')
+
+
+# Statistics counters. The value each counter was last adjusted for is
+# remembered on the instance so updates need no extra query.
+
+def _remember(instance, field):
+    if field not in instance.get_deferred_fields():
+        instance.__dict__[f'_counted_{field}'] = getattr(instance, field)
+
+
+def _previous(instance, field):
+    return instance.__dict__.get(f'_counted_{field}')
+
+
+def user_initialised(sender, instance, **kwargs):
+    _remember(instance, 'role')
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        counters.increment(counters.USERS_TOTAL)
+        counters.increment(counters.user_role_counter(instance.role))
+    elif update_fields is None or 'role' in update_fields:
+        previous = _previous(instance, 'role')
+        if previous is not None and previous != instance.role:
+            counters.increment(counters.user_role_counter(previous), -1)
+            counters.increment(counters.user_role_counter(instance.role))
+    _remember(instance, 'role')
+
+
+def user_deleted(sender, instance, **kwargs):
+    counters.increment(counters.USERS_TOTAL, -1)
+    counters.increment(counters.user_role_counter(_previous(instance, 'role') or instance.role), -1)
+
+
+def message_initialised(sender, instance, **kwargs):
+    _remember(instance, 'is_read')
+
+
+def message_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        counters.increment(counters.MESSAGES_TOTAL)
+        if not instance.is_read:
+            counters.increment(counters.MESSAGES_UNREAD)
+    elif update_fields is None or 'is_read' in update_fields:
+        previous = _previous(instance, 'is_read')
+        if previous is not None and previous != instance.is_read:
+            counters.increment(counters.MESSAGES_UNREAD, -1 if instance.is_read else 1)
+    _remember(instance, 'is_read')
+
+
+def message_deleted(sender, instance, **kwargs):
+    counters.increment(counters.MESSAGES_TOTAL, -1)
+    if not instance.is_read:
+        counters.increment(counters.MESSAGES_UNREAD, -1)
+
+
+post_init.connect(user_initialised, sender=settings.AUTH_USER_MODEL, dispatch_uid='cms_counters_user_init')
+post_save.connect(user_saved, sender=settings.AUTH_USER_MODEL, dispatch_uid='cms_counters_user_saved')
+post_delete.connect(user_deleted, sender=settings.AUTH_USER_MODEL, dispatch_uid='cms_counters_user_deleted')
+post_init.connect(message_initialised, sender=ContactMessage, dispatch_uid='cms_counters_message_init')
+post_save.connect(message_saved, sender=ContactMessage, dispatch_uid='cms_counters_message_saved')
+post_delete.connect(message_deleted, sender=ContactMessage, dispatch_uid='cms_counters_message_deleted')
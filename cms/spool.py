@@ -0,0 +1,203 @@
+"""
+Durable local spool for contact form submissions
+
+During a surge every contact POST doing its own INSERT queues up behind
+SQLite's single writer. With CONTACT_SPOOL_ENABLED the view writes the
+validated payload to a spool file instead, and the ``drain_contact_spool``
+command inserts them in batches with bulk_create.
+
+Each entry is written to ``tmp/`` and renamed into ``new/``, so readers
+never see a partial file. Entries are only deleted after the batch that
+contains them has committed, and each row records its entry's key, so a
+worker dying at any point neither loses nor duplicates messages. Several
+drains may run at once: a row another drain inserted after this one
+checked the keys is skipped, as the unique spool key rejects it. Entries
+carry their submission time, which becomes the message's date_created
+however long they wait in the spool.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters
+from .models import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+CONTACT_FIELDS = ('name', 'email', 'subject', 'message')
+
+
+def _fsync_dir(path):
+    """Make a rename into a directory durable; not possible on Windows"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SpoolEntry:
+    """A spooled payload and the file it was read from"""
+
+    def __init__(self, path, key, payload):
+        self.path = path
+        self.key = key
+        self.payload = payload
+
+
+class Spool:
+    """A directory of JSON payloads, consumed in submission order"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.tmp_dir = self.directory / 'tmp'
+        self.new_dir = self.directory / 'new'
+        self.bad_dir = self.directory / 'bad'
+
+    def put(self, payload):
+        """Durably store a payload and return its key"""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.new_dir.mkdir(parents=True, exist_ok=True)
+
+        key = uuid.uuid4()
+        name = f'{time.time_ns():020d}-{key.hex}.json'
+        tmp_path = self.tmp_dir / name
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.new_dir / name)
+        _fsync_dir(self.new_dir)
+        return key
+
+    def peek(self, limit):
+        """Return up to limit of the oldest entries without removing them"""
+        try:
+            names = sorted(name for name in os.listdir(self.new_dir) if name.endswith('.json'))
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for name in names[:limit]:
+            path = self.new_dir / name
+            try:
+                key = uuid.UUID(name[:-len('.json')].rsplit('-', 1)[1])
+                with open(path, encoding='utf-8') as f:
+                    payload = json.load(f)
+            except FileNotFoundError:
+                # Consumed by another worker
+                continue
+            except (ValueError, IndexError):
+                logger.error('Moving unreadable spool entry %s aside', path)
+                self.bad_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(path, self.bad_dir / name)
+                continue
+            entries.append(SpoolEntry(path, key, payload))
+        return entries
+
+    def ack(self, entries):
+        """Remove entries whose contents have been committed"""
+        for entry in entries:
+            try:
+                entry.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        try:
+            return sum(1 for name in os.listdir(self.new_dir) if name.endswith('.json'))
+        except FileNotFoundError:
+            return 0
+
+
+def get_contact_spool():
+    return Spool(settings.CONTACT_SPOOL_DIR)
+
+
+def enqueue_contact_message(data):
+    """Spool a validated contact form submission for the worker"""
+    payload = {field: data.get(field, '') for field in CONTACT_FIELDS}
+    payload['submitted_at'] = timezone.now().isoformat()
+    return get_contact_spool().put(payload)
+
+
+def _submitted_at(payload):
+    # Entries spooled before submission times were recorded have none
+    submitted_at = parse_datetime(payload.get('submitted_at') or '')
+    return submitted_at or timezone.now()
+
+
+def _inserted_keys(keys):
+    """The spool keys among keys that already have a row"""
+    # The primary is the only place the previous run's rows are sure to be
+    return set(
+        ContactMessage.objects.using(DEFAULT_DB_ALIAS)
+        .filter(spool_key__in=keys)
+        .values_list('spool_key', flat=True)
+    )
+
+
+def _insert_new(messages):
+    """Insert messages and return those created, skipping any inserted concurrently"""
+    try:
+        with transaction.atomic():
+            ContactMessage.objects.bulk_create(messages)
+        return messages
+    except IntegrityError:
+        # Another drain inserted some of the batch since the keys were
+        # checked; find them row by row
+        created = []
+        for message in messages:
+            try:
+                with transaction.atomic():
+                    ContactMessage.objects.bulk_create([message])
+            except IntegrityError:
+                continue
+            created.append(message)
+        return created
+
+
+def drain_contact_spool(spool=None, batch_size=None):
+    """
+    Insert one batch of spooled messages and return how many were created.
+
+    Entries already inserted by a worker that died before acknowledging
+    them are recognised by their spool key and skipped.
+    """
+    spool = spool or get_contact_spool()
+    batch_size = batch_size or settings.CONTACT_SPOOL_BATCH_SIZE
+
+    entries = spool.peek(batch_size)
+    if not entries:
+        return 0
+
+    with transaction.atomic():
+        inserted = _inserted_keys([entry.key for entry in entries])
+        new_messages = [
+            ContactMessage(
+                spool_key=entry.key,
+                date_created=_submitted_at(entry.payload),
+                **{field: entry.payload.get(field, '') for field in CONTACT_FIELDS},
+            )
+            for entry in entries
+            if entry.key not in inserted
+        ]
+        new_messages = _insert_new(new_messages)
+
+        # bulk_create sends no post_save, so adjust the counters here
+        counters.increment(counters.MESSAGES_TOTAL, len(new_messages))
+        counters.increment(counters.MESSAGES_UNREAD, len(new_messages))
+
+    spool.ack(entries)
+    return len(new_messages)
@@ -0,0 +1,160 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.forms.models import model_to_dict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+
+from . import cache as cms_cache, counters
+from .models import FAQ, ContactMessage, HomepageSection, ServiceFeature, SiteSettings
+from .spool import CONTACT_FIELDS, Spool, drain_contact_spool, enqueue_contact_message
+
+
+class ConditionalGetTests(TestCase):
+    """Public pages answer revalidation with 304 until their content changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('faq')
+
+    def test_etag_revalidation(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        FAQ.objects.create(question='Is it private?', answer='Yes.')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_revalidation(self):
+        FAQ.objects.create(question='Is it private?', answer='Yes.')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        FAQ.objects.create(question='Can I cancel?', answer='Any time.')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 1970 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_empty_tables_are_not_aggregated_per_request(self):
+        # Nothing to date the page by: no FAQs and no recorded edits
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+
+class SiteSettingsCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.settings = SiteSettings.objects.create(site_name='IntimaCare')
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin-password')
+
+    def test_admin_save_is_visible_on_next_request(self):
+        self.assertContains(self.client.get(reverse('home')), '<h3>IntimaCare</h3>', html=True)
+        # What another worker has memoised from the same request
+        other_worker_settings = cms_cache._local_settings
+
+        self.client.force_login(self.admin)
+        data = {**model_to_dict(self.settings, exclude=['id', 'logo']), 'site_name': 'CareLine'}
+        response = self.client.post(reverse('admin:cms_sitesettings_change', args=[self.settings.pk]), data)
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        for local_settings in (cms_cache._local_settings, other_worker_settings):
+            with self.subTest(local_settings=local_settings):
+                cms_cache._local_settings = local_settings
+                response = self.client.get(reverse('home'))
+                self.assertContains(response, '<h3>CareLine</h3>', html=True)
+
+
+class ContactSpoolTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        spool_settings = override_settings(CONTACT_SPOOL_DIR=directory.name)
+        spool_settings.enable()
+        self.addCleanup(spool_settings.disable)
+        self.spool = Spool(directory.name)
+        for i in range(3):
+            enqueue_contact_message({
+                'name': f'Visitor {i}', 'email': f'visitor{i}@example.com',
+                'subject': 'Hello', 'message': 'Please call me back.',
+            })
+
+    def test_drain_inserts_and_removes_entries(self):
+        self.assertEqual(drain_contact_spool(self.spool), 3)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(len(self.spool), 0)
+        self.assertEqual(counters.get_counters(counters.MESSAGES_TOTAL)[counters.MESSAGES_TOTAL], 3)
+
+    def test_messages_keep_their_submission_time(self):
+        submitted = timezone.now() - timedelta(hours=2)
+        with mock.patch.object(timezone, 'now', return_value=submitted):
+            enqueue_contact_message({
+                'name': 'Early visitor', 'email': 'early@example.com',
+                'subject': 'Hello', 'message': 'Sent before the worker ran.',
+            })
+        drain_contact_spool(self.spool)
+        self.assertEqual(ContactMessage.objects.get(name='Early visitor').date_created, submitted)
+
+    def test_rows_inserted_by_a_concurrent_drain_are_skipped(self):
+        # Another drain inserts the first entry just after this one checked
+        first = self.spool.peek(1)[0]
+        ContactMessage.objects.bulk_create([ContactMessage(
+            spool_key=first.key, **{field: first.payload[field] for field in CONTACT_FIELDS},
+        )])
+        counters.increment(counters.MESSAGES_TOTAL, 1)
+
+        with mock.patch('cms.spool._inserted_keys', return_value=set()):
+            self.assertEqual(drain_contact_spool(self.spool), 2)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(len(self.spool), 0)
+        self.assertEqual(counters.get_counters(counters.MESSAGES_TOTAL)[counters.MESSAGES_TOTAL], 3)
+
+    def test_restart_after_commit_before_ack(self):
+        # The worker dies after the batch commits but before its files go
+        with mock.patch.object(Spool, 'ack', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                drain_contact_spool(self.spool)
+        self.assertEqual(len(self.spool), 3)
+
+        # The restarted worker recognises the rows by spool key
+        self.assertEqual(drain_contact_spool(self.spool), 0)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(len(self.spool), 0)
+        self.assertEqual(counters.get_counters(counters.MESSAGES_TOTAL)[counters.MESSAGES_TOTAL], 3)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+class ListingIndexTests(TestCase):
+    """Active rows in display order are read from the partial indexes, without sorting"""
+
+    def test_listings_use_partial_indexes(self):
+        for model, index in (
+            (HomepageSection, 'cms_section_active_order_idx'),
+            (FAQ, 'cms_faq_active_order_idx'),
+            (ServiceFeature, 'cms_service_active_order_idx'),
+        ):
+            with self.subTest(model=model.__name__):
+                plan = model.objects.filter(active=True).explain()
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,51 @@
+"""
+Markdown rendering helpers shared by CMS models and template filters
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import markdown
+
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.nl2br',  # Convert newlines to <br>
+    'markdown.extensions.fenced_code',  # Support for code blocks
+    'markdown.extensions.tables',  # Support for tables
+]
+
+# Rendered HTML for ad-hoc markdown, keyed by content hash
+RENDER_CACHE_SIZE = 128
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def content_hash(text):
+    """Return a stable SHA-256 hex digest for the given text"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    """Convert markdown text to HTML"""
+    if not text:
+        return ''
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def render_markdown_cached(text):
+    """Convert markdown text to HTML, reusing recent conversions"""
+    if not text:
+        return ''
+
+    key = content_hash(text)
+    with _render_cache_lock:
+        html = _render_cache.get(key)
+        if html is not None:
+            _render_cache.move_to_end(key)
+            return html
+
+    html = render_markdown(text)
+    with _render_cache_lock:
+        _render_cache[key] = html
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return html
@@ -0,0 +1,61 @@
+"""
+Benchmarks run by ``manage.py benchmark``
+
+An app registers benchmarks by decorating functions in its ``benchmarks``
+module with @benchmark. Each function takes the number of rows or requests
+to work with and yields (label, timings in seconds) pairs, which the
+command prints as latency percentiles and operations per second.
+
+The command runs every benchmark against a throwaway test database, so
+seeding a million rows never touches real data.
+"""
+import statistics
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.utils.module_loading import module_has_submodule
+
+_registry = {}
+
+
+def benchmark(size):
+    """Register a benchmark function with its default size"""
+    def decorator(func):
+        _registry[func.__name__] = (func, size)
+        return func
+    return decorator
+
+
+def autodiscover():
+    """Import every installed app's benchmarks module"""
+    for app_config in apps.get_app_configs():
+        if module_has_submodule(app_config.module, 'benchmarks'):
+            import_module(f'{app_config.name}.benchmarks')
+    return dict(_registry)
+
+
+def timed(func, repeat):
+    """Call func repeat times, returning the duration of each call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    """One line of percentiles (in ms) and throughput for a list of timings"""
+    ordered = sorted(timings)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    total = sum(ordered)
+    rate = len(ordered) / total if total else float('inf')
+    return (
+        f'n={len(ordered)} mean={statistics.fmean(ordered) * 1000:.2f}ms '
+        f'p50={percentile(50):.2f}ms p95={percentile(95):.2f}ms p99={percentile(99):.2f}ms '
+        f'{rate:.0f}/s'
+    )
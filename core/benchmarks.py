@@ -0,0 +1,108 @@
+"""Benchmarks for core (see core.benchmark)"""
+import asyncio
+import importlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+from accounts.models import User
+from cms.models import FAQ
+
+from . import urls as core_urls
+from .benchmark import benchmark, timed
+
+PUBLIC_PAGES = ('home', 'services', 'faq', 'contact')
+
+
+def _post(client, url, data, expected_status):
+    def post():
+        response = client.post(url, json.dumps(data), content_type='application/json')
+        assert response.status_code == expected_status, response.status_code
+    return post
+
+
+@benchmark(size=200)
+def rejected_login(size):
+    """Cost of a login the rate limiter rejects, against one it lets through"""
+    User.objects.create_user('patient', 'patient@example.com', 'correct-password')
+    client = Client()
+    url = reverse('login_api')
+    data = {'email': 'patient@example.com', 'password': 'wrong-password'}
+
+    # Allowed attempts hash the password, so fewer of them are timed
+    with override_settings(RATELIMIT_RATES={'login': {'ip': f'{size}/min'}}):
+        yield 'allowed, wrong password', timed(_post(client, url, data, 400), max(1, size // 20))
+    with override_settings(RATELIMIT_RATES={'login': {'ip': '0/min'}}):
+        yield 'rejected with 429', timed(_post(client, url, data, 429), size)
+
+
+@contextmanager
+def _async_public_views(enabled):
+    """Route the public pages to their sync or async views"""
+    with override_settings(CORE_ASYNC_VIEWS=enabled):
+        importlib.reload(core_urls)
+        clear_url_caches()
+        try:
+            yield
+        finally:
+            importlib.reload(core_urls)
+            clear_url_caches()
+
+
+def _wsgi_load(urls, concurrency):
+    """GET urls through the WSGI handler from concurrency threads"""
+    def fetch(url):
+        start = time.perf_counter()
+        response = Client().get(url)
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        timings = list(pool.map(fetch, urls))
+    return timings, time.perf_counter() - start
+
+
+async def _asgi_load(urls, concurrency):
+    """GET urls through the ASGI handler with concurrency requests in flight"""
+    client = AsyncClient()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        async with slots:
+            start = time.perf_counter()
+            response = await client.get(url)
+            assert response.status_code == 200, response.status_code
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*(fetch(url) for url in urls))
+    return list(timings), time.perf_counter() - start
+
+
+@benchmark(size=400)
+def public_pages(size, concurrency=16):
+    """Public pages under concurrent load: WSGI, ASGI with sync views, ASGI with async views"""
+    FAQ.objects.bulk_create([FAQ(question=f'Question {i}?', answer='Answer. ' * 50, order=i) for i in range(20)])
+    urls = [reverse(PUBLIC_PAGES[i % len(PUBLIC_PAGES)]) for i in range(size)]
+    servers = [
+        ('WSGI', False, _wsgi_load),
+        ('ASGI, sync views', False, async_to_sync(_asgi_load)),
+        ('ASGI, async views', True, async_to_sync(_asgi_load)),
+    ]
+
+    for state in ('rendered', 'cached'):
+        for name, async_views, load in servers:
+            with _async_public_views(async_views), ExitStack() as stack:
+                if state == 'rendered':
+                    # Every lookup in the page cache misses
+                    stack.enter_context(mock.patch('cms.cache._lookup_page', return_value=(None, None)))
+                load(urls[:concurrency], concurrency)  # warm up
+                timings, elapsed = load(urls, concurrency)
+            yield f'{name}, {state}, {concurrency} concurrent ({size / elapsed:.0f} req/s overall)', timings
@@ -0,0 +1,238 @@
+"""
+Critical CSS for pages built on base.html and dashboard_base.html
+
+Both base templates used to block first paint on their stylesheets. The
+``build_critical_css`` command now scans each page template, together with
+the templates it extends and includes, for the tags, classes and ids used
+above the fold. A template marks where that part ends with a
+``{# below the fold #}`` comment; markup after it is left out of the scan,
+and a template without the marker is scanned whole. The command keeps only
+the matching rules from the page's stylesheets and writes them to
+CRITICAL_CSS_MANIFEST, keyed by template name and stamped with a hash of
+those template sources.
+
+The ``{% critical_stylesheets %}`` tag in the base templates inlines that
+subset and loads the full stylesheets without blocking rendering. If a
+page has no entry, or its templates changed since the build, the tag
+falls back to ordinary blocking <link> tags.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+from .staticfiles import minify_css
+
+TAG_NAME = 'critical_stylesheets'
+FOLD_MARKER = '{# below the fold #}'
+
+_EXTENDS = re.compile(r'{%\s*(?:extends|include)\s+["\']([^"\']+)["\']')
+_STYLESHEETS = re.compile(r'{%\s*' + TAG_NAME + r'((?:\s+["\'][^"\']+["\'])+)\s*%}')
+_TEMPLATE_SYNTAX = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+_CLASS_ATTR = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']')
+_ID_ATTR = re.compile(r'\bid\s*=\s*["\']([^"\']*)["\']')
+_TAGS = re.compile(r'<([a-zA-Z][\w-]*)')
+
+# Classes added at render time that the scan cannot see, e.g. message.tags
+DYNAMIC_CLASSES = {'debug', 'info', 'success', 'warning', 'error'}
+# Elements every page has even when a template does not spell them out
+DEFAULT_TAGS = {'html', 'body', 'head'}
+
+_template_hashes = {}
+_manifest = None
+
+
+def template_sources(template_name):
+    """Sources of a template and every template it extends or includes"""
+    sources, pending, seen = [], [template_name], set()
+    while pending:
+        name = pending.pop(0)
+        if name in seen:
+            continue
+        seen.add(name)
+        try:
+            source = get_template(name).template.source
+        except TemplateDoesNotExist:
+            continue
+        sources.append(source)
+        pending.extend(_EXTENDS.findall(source))
+    return sources
+
+
+def template_hash(template_name):
+    """Digest of a page template and its parents, remembered outside DEBUG"""
+    digest = _template_hashes.get(template_name)
+    if digest is None or settings.DEBUG:
+        sha = hashlib.sha256()
+        for source in template_sources(template_name):
+            sha.update(source.encode('utf-8'))
+        digest = sha.hexdigest()[:16]
+        _template_hashes[template_name] = digest
+    return digest
+
+
+def used_selectors(sources):
+    """The (tags, classes, ids) that appear above the fold in template sources"""
+    tags, classes, ids = set(DEFAULT_TAGS), set(DYNAMIC_CLASSES), set()
+    for source in sources:
+        source = source.split(FOLD_MARKER, 1)[0]
+        # Template syntax inside attributes is replaced by a separator so
+        # "btn {% if x %}active{% endif %}" still yields both names
+        markup = _TEMPLATE_SYNTAX.sub(' ', source)
+        tags.update(tag.lower() for tag in _TAGS.findall(markup))
+        for value in _CLASS_ATTR.findall(markup):
+            classes.update(value.split())
+        for value in _ID_ATTR.findall(markup):
+            ids.update(value.split())
+        # Names written only inside template tags or conditionals
+        for value in re.findall(r'["\']([\w\s-]+)["\']', source):
+            classes.update(value.split())
+    return tags, classes, ids
+
+
+def split_rules(css):
+    """Split a stylesheet into top-level (prelude, block body) pairs"""
+    rules = []
+    depth, start, prelude_end = 0, 0, None
+    i, length = 0, len(css)
+    while i < length:
+        char = css[i]
+        if char in '"\'':
+            end = css.find(char, i + 1)
+            while end != -1 and css[end - 1] == '\\':
+                end = css.find(char, end + 1)
+            i = length if end == -1 else end
+        elif char == '{':
+            if depth == 0:
+                prelude_end = i
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:prelude_end].strip(), css[prelude_end + 1:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            # Block-less at-rules such as @charset or @import
+            rules.append((css[start:i].strip(), None))
+            start = i + 1
+        i += 1
+    return rules
+
+
+def _selector_used(selector, tags, classes, ids):
+    # Drop pseudo-class arguments, pseudo-classes/elements and attribute
+    # selectors, which never make a rule irrelevant to a page
+    simple = re.sub(r'\([^)]*\)', '', selector)
+    simple = re.sub(r'\[[^\]]*\]', '', simple)
+    simple = re.sub(r'::?[\w-]+', '', simple)
+    if not set(re.findall(r'\.([\w-]+)', simple)) <= classes:
+        return False
+    if not set(re.findall(r'#([\w-]+)', simple)) <= ids:
+        return False
+    element_names = re.findall(r'(?:^|[\s>+~,])([a-zA-Z][\w-]*)', simple)
+    return set(name.lower() for name in element_names) <= tags
+
+
+def extract_critical_css(css, tags, classes, ids):
+    """The rules of css whose selectors only use the given names"""
+    output = []
+    for prelude, body in split_rules(re.sub(r'/\*.*?\*/', '', css, flags=re.S)):
+        if body is None:
+            continue
+        if prelude.startswith('@'):
+            if prelude.startswith(('@media', '@supports')):
+                inner = extract_critical_css(body, tags, classes, ids)
+                if inner:
+                    output.append(f'{prelude}{{{inner}}}')
+            # @keyframes and @font-face can wait for the full stylesheet
+            continue
+        selectors = [s.strip() for s in prelude.split(',') if _selector_used(s.strip(), tags, classes, ids)]
+        if selectors:
+            output.append(f'{",".join(selectors)}{{{body}}}')
+    return minify_css(''.join(output))
+
+
+def page_templates():
+    """Names of every project template that renders critical stylesheets"""
+    directories = [Path(d) for backend in settings.TEMPLATES for d in backend.get('DIRS', [])]
+    directories += [
+        Path(app_config.path) / 'templates'
+        for app_config in apps.get_app_configs()
+        if Path(app_config.path).is_relative_to(settings.BASE_DIR)
+    ]
+    names = set()
+    for directory in directories:
+        for path in directory.rglob('*.html'):
+            names.add(path.relative_to(directory).as_posix())
+    return sorted(
+        name for name in names
+        if any(_STYLESHEETS.search(source) for source in template_sources(name))
+    )
+
+
+def build_critical_css(template_name):
+    """Return the manifest entry for one page template"""
+    sources = template_sources(template_name)
+    stylesheets = []
+    for source in sources:
+        match = _STYLESHEETS.search(source)
+        if match:
+            stylesheets = re.findall(r'["\']([^"\']+)["\']', match.group(1))
+            break
+
+    tags, classes, ids = used_selectors(sources)
+    css = []
+    for name in stylesheets:
+        path = finders.find(name)
+        if path:
+            with open(path, encoding='utf-8') as f:
+                css.append(extract_critical_css(f.read(), tags, classes, ids))
+    return {
+        'hash': template_hash(template_name),
+        'stylesheets': stylesheets,
+        'css': ''.join(css),
+    }
+
+
+def manifest_path():
+    return Path(getattr(settings, 'CRITICAL_CSS_MANIFEST', Path(settings.STATIC_ROOT) / 'critical-css.json'))
+
+
+def save_manifest(entries):
+    global _manifest
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    _manifest = None
+
+
+def load_manifest():
+    """The built manifest, read once per process outside DEBUG"""
+    global _manifest
+    if _manifest is None or settings.DEBUG:
+        try:
+            with open(manifest_path(), encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def get_critical_css(template_name, stylesheets):
+    """The inline CSS built for a page, or None if missing or out of date"""
+    entry = load_manifest().get(template_name)
+    if not entry or entry['stylesheets'] != list(stylesheets):
+        return None
+    if entry['hash'] != template_hash(template_name):
+        return None
+    return entry['css']
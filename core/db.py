@@ -0,0 +1,27 @@
+"""
+Database connection tuning
+
+SQLite defaults to a rollback journal, so a single writer blocks every
+reader and concurrent writers fail fast with "database is locked". New
+SQLite connections are switched to WAL mode with a busy timeout so reads
+never block on writes and writers wait for each other instead of failing.
+"""
+from django.conf import settings
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,  # milliseconds
+    'mmap_size': 134217728,  # 128 MB
+    'temp_store': 'MEMORY',
+}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver applying SQLITE_PRAGMAS to new connections"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
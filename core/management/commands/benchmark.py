@@ -0,0 +1,46 @@
+import logging
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from core.benchmark import autodiscover, summarize
+
+
+class Command(BaseCommand):
+    help = 'Run benchmarks from each app\'s benchmarks module against a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: list them)')
+        parser.add_argument('--size', type=int, help='Rows or requests to use instead of each benchmark\'s default')
+
+    def handle(self, *args, **options):
+        registry = autodiscover()
+        if not options['names']:
+            for name, (func, size) in sorted(registry.items()):
+                summary = (func.__doc__ or '').strip().splitlines()[0] if func.__doc__ else ''
+                self.stdout.write(f'{name} (size {size}): {summary}')
+            return
+        unknown = set(options['names']) - set(registry)
+        if unknown:
+            raise CommandError(f'Unknown benchmarks: {", ".join(sorted(unknown))}')
+
+        # Rejected and failed requests are expected, not worth a log line each
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            for name in options['names']:
+                func, size = registry[name]
+                for cache in caches.all():
+                    cache.clear()
+                for label, timings in func(options['size'] or size):
+                    self.stdout.write(f'{name}: {label}: {summarize(timings)}')
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            request_logger.setLevel(log_level)
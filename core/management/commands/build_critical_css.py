@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from core.critical_css import build_critical_css, manifest_path, page_templates, save_manifest
+
+
+class Command(BaseCommand):
+    help = 'Extract the critical CSS of each page template into the critical CSS manifest'
+
+    def handle(self, *args, **options):
+        entries = {}
+        for template_name in page_templates():
+            entry = build_critical_css(template_name)
+            entries[template_name] = entry
+            self.stdout.write(f'  {template_name}: {len(entry["css"])} bytes')
+
+        save_manifest(entries)
+        self.stdout.write(self.style.SUCCESS(f'Wrote critical CSS for {len(entries)} templates to {manifest_path()}!'))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.dateparse import parse_date
+from accounts.models import User
+from cms.models import ContactMessage
+from core.export import (
+    EXPORT_CHUNK_SIZE, FORMATS, USER_EXPORT_FIELDS, MESSAGE_EXPORT_FIELDS, MESSAGE_FREE_TEXT_FIELDS,
+    filter_date_range, iter_export,
+)
+
+EXPORTS = {
+    'users': (User, USER_EXPORT_FIELDS, 'date_joined', ()),
+    'messages': (ContactMessage, MESSAGE_EXPORT_FIELDS, 'date_created', MESSAGE_FREE_TEXT_FIELDS),
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream users or contact messages as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help='Output format (default: csv)')
+        parser.add_argument('--since', help='Only rows created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Only rows created on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched from the database at a time (default: {EXPORT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database to read from (default: "default")',
+        )
+
+    def _date(self, options, name):
+        value = options[name]
+        if not value:
+            return None
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'--{name} must be a date in YYYY-MM-DD format.')
+        return date
+
+    def handle(self, *args, **options):
+        model, fields, date_field, escape = EXPORTS[options['model']]
+        queryset = filter_date_range(
+            model.objects.using(options['database']).order_by('pk'),
+            date_field,
+            since=self._date(options, 'since'),
+            until=self._date(options, 'until'),
+        )
+
+        lines = iter_export(queryset, fields, options['format'], chunk_size=options['chunk_size'], escape=escape)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                f.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f'Exported {options["model"]} to {options["output"]}'))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,41 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from cms.cache import bump_model_version
+from cms.models import SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to the read replica file'
+
+    def handle(self, *args, **options):
+        if 'replica' not in settings.DATABASES:
+            raise CommandError('No "replica" database is configured (set DB_REPLICA_NAME).')
+        
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES['replica']
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError('sync_replica only supports SQLite; use database replication instead.')
+        
+        self.stdout.write(f"Copying {primary['NAME']} -> {replica['NAME']}...")
+        
+        # Close Django's replica connection so the file can be replaced cleanly
+        connections['replica'].close()
+        
+        # The backup API takes a consistent snapshot while writers continue
+        source = sqlite3.connect(str(primary['NAME']))
+        target = sqlite3.connect(str(replica['NAME']))
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        
+        # Pages and settings cached from the old replica contents are stale now
+        for model in (SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature):
+            bump_model_version(model)
+        
+        self.stdout.write(self.style.SUCCESS('Replica synchronized!'))
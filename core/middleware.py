@@ -0,0 +1,177 @@
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import reverse
+
+from .routers import pin_to_primary, reset_pinning, wrote_to_primary
+
+logger = logging.getLogger('core.queries')
+
+PRIMARY_COOKIE_NAME = 'primary_until'
+
+# Fingerprints drop literal values so repeats of one query group together
+_SQL_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SQL_IN_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pin database reads to the primary when the replica may be stale for
+    this client: in the admin, after a write in this request, and for
+    REPLICA_STICKY_SECONDS after the client's last write.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._start(request)
+        response = self.get_response(request)
+        return self._finish(response)
+
+    async def __acall__(self, request):
+        self._start(request)
+        response = await self.get_response(request)
+        return self._finish(response)
+
+    def _start(self, request):
+        reset_pinning()
+        if self._needs_primary(request):
+            pin_to_primary()
+
+    def _finish(self, response):
+        if wrote_to_primary():
+            sticky = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            response.set_cookie(
+                PRIMARY_COOKIE_NAME,
+                str(int(time.time()) + sticky),
+                max_age=sticky,
+                httponly=True,
+                samesite='Lax',
+            )
+        reset_pinning()
+        return response
+
+    def _needs_primary(self, request):
+        if request.path.startswith(reverse('admin:index')):
+            return True
+        try:
+            return int(request.COOKIES.get(PRIMARY_COOKIE_NAME, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+def sql_fingerprint(sql):
+    """SQL with literal values and IN lists collapsed so repeats group together"""
+    sql = _SQL_STRINGS.sub('?', sql)
+    sql = _SQL_NUMBERS.sub('?', sql)
+    sql = _SQL_IN_LISTS.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryStats:
+    """Queries run while handling one request; an execute_wrapper callable"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            entry = self.fingerprints[sql_fingerprint(sql)]
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def top(self, limit=5):
+        """The (fingerprint, count, seconds) that took longest in total"""
+        ranked = sorted(self.fingerprints.items(), key=lambda item: item[1][1], reverse=True)
+        return [(fingerprint, count, seconds) for fingerprint, (count, seconds) in ranked[:limit]]
+
+
+class QueryCountMiddleware:
+    """
+    Count the queries and database time of each request, report them in a
+    Server-Timing header and log requests over QUERY_COUNT_THRESHOLD
+    queries or SLOW_REQUEST_MS milliseconds with their costliest SQL.
+
+    Removed from the stack at startup unless QUERY_COUNT_ENABLED is on, so
+    it costs nothing when disabled. Queries run while a streaming response
+    is consumed are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_COUNT_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.query_threshold = getattr(settings, 'QUERY_COUNT_THRESHOLD', 50)
+        self.slow_request_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, start = QueryStats(), time.perf_counter()
+        with self._wrap(stats):
+            response = self.get_response(request)
+        return self._finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        # Connections are per thread and async views query through
+        # sync_to_async, so wrap the connections of the thread that runs
+        # this request's sync code rather than the event loop's
+        stats, start = QueryStats(), time.perf_counter()
+        stack = await sync_to_async(self._wrap)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._finish(request, response, stats, start)
+
+    def _wrap(self, stats):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        return stack
+
+    def _finish(self, request, response, stats, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = stats.duration * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms - db_ms:.1f}'
+        )
+        if stats.count > self.query_threshold or total_ms > self.slow_request_ms:
+            logger.warning(
+                '%s %s ran %d queries in %.1f ms (%.1f ms total)\n%s',
+                request.method, request.path, stats.count, db_ms, total_ms,
+                '\n'.join(
+                    f'  {count}x {seconds * 1000:.1f} ms: {fingerprint}'
+                    for fingerprint, count, seconds in stats.top()
+                ),
+            )
+        return response
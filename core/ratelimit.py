@@ -0,0 +1,232 @@
+"""
+Sliding-window rate limiting for the login, signup and contact endpoints
+
+Each scope (see RATELIMIT_RATES) has a counter per client IP and, when the
+request carries one, per submitted email address. A rate of "5/min" allows
+5 requests in any 60 seconds: requests are counted per fixed window, and
+the previous window's count is weighted by how much of it still overlaps
+the last 60 seconds. Counters live in the Django cache so every worker
+shares them; if the cache is unavailable a process-local cache is used
+instead.
+
+Counters are only changed with the cache's atomic add() and incr(), so
+concurrent requests each see a distinct count and cannot all pass on the
+same remaining allowance. Checks only touch the request and the cache, so
+rejected requests never reach password hashing or the database.
+"""
+import functools
+import hashlib
+import json
+import logging
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+DEFAULT_RATES = {
+    'login': {'ip': '30/min', 'email': '10/min'},
+    'signup': {'ip': '10/hour', 'email': '5/hour'},
+    'contact': {'ip': '5/min', 'email': '10/hour'},
+}
+
+
+def parse_rate(rate):
+    """Return (requests allowed, window length in seconds) for a rate like '5/min'"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+# Process-local counters used when the shared cache fails
+_local_cache = LocMemCache('ratelimit-fallback', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+
+
+def _incr(store, key, timeout):
+    """Atomically add one to a window counter, creating it if needed"""
+    store.add(key, 0, timeout)
+    try:
+        return store.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        store.add(key, 0, timeout)
+        return store.incr(key)
+
+
+def _decr(store, key, timeout):
+    """Take a rejected request back out of a window counter"""
+    try:
+        store.decr(key)
+    except ValueError:
+        # The window expired since incr(), so there is nothing to take back.
+        # Letting the error through would count the request again locally
+        store.add(key, 0, timeout)
+
+
+class SlidingWindowLimiter:
+    """Count a request against each of its windows, or against none at all"""
+
+    def __init__(self, rates=None, cache_alias=None):
+        self._rates = rates
+        self._cache_alias = cache_alias
+
+    @property
+    def rates(self):
+        if self._rates is None:
+            return getattr(settings, 'RATELIMIT_RATES', DEFAULT_RATES)
+        return self._rates
+
+    @property
+    def store(self):
+        return caches[self._cache_alias or getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')]
+
+    def hit(self, scope, idents, now=None):
+        """
+        Count a request against the window of every (kind, value) pair in
+        idents.
+
+        Returns None if the request is allowed, or the number of seconds
+        until it would be.
+        """
+        now = time.time() if now is None else now
+        limits = {}
+        for kind, value in idents:
+            rate = self.rates.get(scope, {}).get(kind)
+            if rate and value:
+                digest = hashlib.md5(str(value).encode()).hexdigest()
+                limits[f'ratelimit:{scope}:{kind}:{digest}'] = parse_rate(rate)
+        if not limits:
+            return None
+
+        try:
+            return self._hit(self.store, limits, now)
+        except Exception:
+            logger.warning('Rate limit cache unavailable, using local counters', exc_info=True)
+            return self._hit(_local_cache, limits, now)
+
+    def _hit(self, store, limits, now):
+        windows = {}
+        for key, (limit, period) in limits.items():
+            window = int(now // period)
+            windows[key] = (f'{key}:{window}', f'{key}:{window - 1}', now - window * period, period)
+        previous_counts = store.get_many([previous for _, previous, _, _ in windows.values()])
+
+        counted = []
+        retry_after = 0
+        for key, (current, previous, elapsed, period) in windows.items():
+            limit = limits[key][0]
+            # Each concurrent request gets its own count from incr()
+            timeout = math.ceil(2 * period)
+            count = _incr(store, current, timeout)
+            counted.append((current, timeout))
+            previous_count = previous_counts.get(previous, 0)
+            if previous_count * (1 - elapsed / period) + count > limit:
+                retry_after = max(retry_after, _wait(limit, count, previous_count, elapsed, period))
+        if retry_after:
+            # Rejected requests are taken back out of every window
+            for current, timeout in counted:
+                _decr(store, current, timeout)
+            return retry_after
+        return None
+
+
+def _wait(limit, count, previous_count, elapsed, period):
+    """Seconds until a rejected request would fit in its window"""
+    if count > limit or not previous_count:
+        return period - elapsed
+    # The previous window's weight falls until its share leaves room
+    overlap_needed = (limit - count) / previous_count
+    return max(1.0, period * (1 - overlap_needed) - elapsed)
+
+
+limiter = SlidingWindowLimiter()
+
+
+def client_ip(request):
+    """
+    The visitor's address. Behind a reverse proxy REMOTE_ADDR is the proxy
+    itself, so RATELIMIT_IP_HEADER names the META key the proxy sets, e.g.
+    'HTTP_X_REAL_IP'. Only configure it when every request passes through
+    that proxy, as clients can send the header themselves.
+    """
+    header = getattr(settings, 'RATELIMIT_IP_HEADER', '')
+    if header:
+        value = request.META.get(header, '')
+        # X-Forwarded-For style lists end with the address the proxy saw
+        forwarded = [part.strip() for part in value.split(',') if part.strip()]
+        if forwarded:
+            return forwarded[-1]
+    return request.META.get('REMOTE_ADDR')
+
+
+def submitted_email(request):
+    """The email address posted with the request, normalised for use as a key"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        email = data.get('email') if isinstance(data, dict) else None
+    else:
+        email = request.POST.get('email')
+    if isinstance(email, str) and email.strip():
+        return email.strip().lower()
+    return None
+
+
+def check_request(scope, request, email):
+    """Rate limit a request by IP and email, returning the retry delay or None"""
+    if not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return None
+    return limiter.hit(scope, [('ip', client_ip(request)), ('email', email)])
+
+
+def _check_view_request(scope, request):
+    return check_request(scope, request, submitted_email(request))
+
+
+def too_many_requests(request, retry_after):
+    """A minimal 429 response; nothing is rendered for rejected requests"""
+    wait = math.ceil(retry_after)
+    if request.content_type == 'application/json':
+        response = JsonResponse(
+            {'detail': f'Request was throttled. Expected available in {wait} seconds.'},
+            status=429,
+        )
+    else:
+        response = HttpResponse(
+            'Too many attempts. Please wait a moment and try again.',
+            status=429,
+            content_type='text/plain; charset=utf-8',
+        )
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Decorator rejecting requests to a view once its scope's limits are reached"""
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def _wrapped_view(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = await sync_to_async(_check_view_request)(scope, request)
+                    if retry_after is not None:
+                        return too_many_requests(request, retry_after)
+                return await view_func(request, *args, **kwargs)
+        else:
+            @functools.wraps(view_func)
+            def _wrapped_view(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = _check_view_request(scope, request)
+                    if retry_after is not None:
+                        return too_many_requests(request, retry_after)
+                return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,65 @@
+"""
+Read replica routing
+
+Reads of CMS content go to the ``replica`` database when one is configured,
+everything else (and every write) goes to ``default``. Once a request has
+written, or within REPLICA_STICKY_SECONDS of a previous write by the same
+client, reads are pinned to ``default`` so editors see their own changes
+before the replica catches up. See core.middleware.PrimaryPinningMiddleware.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_DB = 'replica'
+PRIMARY_DB = 'default'
+
+# Models whose reads may be served from the replica: published CMS content
+# only. Contact messages and counters are read to decide what to write, so
+# they always come from the primary
+REPLICA_MODELS = {
+    'cms.sitesettings',
+    'cms.homepagesection',
+    'cms.faq',
+    'cms.legaldocument',
+    'cms.servicefeature',
+}
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def reset_pinning():
+    _pinned.set(False)
+    _wrote.set(False)
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if REPLICA_DB not in settings.DATABASES or _pinned.get():
+            return PRIMARY_DB
+        if model._meta.label_lower in REPLICA_MODELS:
+            return REPLICA_DB
+        return PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary (see the sync_replica command)
+        return db == PRIMARY_DB
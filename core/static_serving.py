@@ -0,0 +1,197 @@
+"""
+Serve collected static files ahead of Django, preferring precompressed copies
+
+Wraps the WSGI or ASGI application (see intimacare/wsgi.py and asgi.py)
+when SERVE_STATIC is on. Requests under STATIC_URL are answered straight
+from STATIC_ROOT without going through middleware: the ``.br`` or ``.gz``
+sibling written by collectstatic is sent when the client accepts it, and
+files with a hashed name from the manifest get a far-future immutable
+Cache-Control header.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+import threading
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.conf import settings
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+CHUNK_SIZE = 64 * 1024
+
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """The content codings an Accept-Encoding header allows"""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFile:
+    """A static file and its precompressed siblings"""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.encoded = {
+            coding: path + suffix
+            for coding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        }
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type and (content_type.startswith('text/') or content_type in ('application/javascript', 'application/json')):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type or 'application/octet-stream'
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL
+
+    def select(self, accept_encoding):
+        """Return (path, headers) of the best representation for the client"""
+        path, coding = self.path, None
+        if self.encoded:
+            accepted = accepted_encodings(accept_encoding)
+            for candidate, _ in ENCODINGS:
+                if candidate in accepted and candidate in self.encoded:
+                    path, coding = self.encoded[candidate], candidate
+                    break
+
+        stat = os.stat(path)
+        headers = [
+            ('Content-Type', self.content_type),
+            ('Content-Length', str(stat.st_size)),
+            ('Cache-Control', self.cache_control),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if self.encoded:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if coding:
+            headers.append(('Content-Encoding', coding))
+        return path, headers
+
+
+class StaticFileFinder:
+    """Map request paths to files under STATIC_ROOT, remembering lookups"""
+
+    def __init__(self, root=None, prefix=None):
+        self.root = Path(root or settings.STATIC_ROOT).resolve()
+        self.prefix = prefix or settings.STATIC_URL
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        self._files = {}
+        self._lock = threading.Lock()
+        self._hashed_names = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.root / 'staticfiles.json', encoding='utf-8') as f:
+                return set(json.load(f).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def find(self, request_path):
+        """The StaticFile for a request path, or None to pass the request on"""
+        if not request_path.startswith(self.prefix):
+            return None
+        name = unquote(request_path[len(self.prefix):])
+        static_file = self._files.get(name)
+        if static_file is not None:
+            return static_file
+
+        path = (self.root / name).resolve()
+        # Never serve the siblings directly or anything outside the root;
+        # misses are not remembered so unknown paths cannot grow the map
+        if (
+            self.root not in path.parents
+            or not path.is_file()
+            or name.endswith(tuple(suffix for _, suffix in ENCODINGS))
+        ):
+            return None
+        static_file = StaticFile(str(path), immutable=name in self._hashed_names)
+        with self._lock:
+            self._files[name] = static_file
+        return static_file
+
+
+class PrecompressedStaticWSGI:
+    """WSGI middleware serving STATIC_ROOT before the wrapped application"""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.finder = StaticFileFinder(root, prefix)
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        static_file = self.finder.find(environ.get('PATH_INFO', ''))
+        if static_file is None:
+            return self.application(environ, start_response)
+
+        path, headers = static_file.select(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        f = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(f, CHUNK_SIZE)
+        return _iter_file(f)
+
+
+def _iter_file(f):
+    with f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+class PrecompressedStaticASGI:
+    """ASGI middleware serving STATIC_ROOT before the wrapped application"""
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.finder = StaticFileFinder(root, prefix)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return await self.application(scope, receive, send)
+        static_file = self.finder.find(scope['path'])
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        request_headers = dict(scope['headers'])
+        accept_encoding = request_headers.get(b'accept-encoding', b'').decode('latin-1')
+        loop = asyncio.get_running_loop()
+        path, headers = await loop.run_in_executor(None, static_file.select, accept_encoding)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        f = await loop.run_in_executor(None, open, path, 'rb')
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+                more = len(chunk) == CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
+        finally:
+            f.close()
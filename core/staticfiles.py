@@ -0,0 +1,76 @@
+"""
+Fingerprinted, minified and precompressed static files
+
+CompressedManifestStaticFilesStorage extends Django's manifest storage so
+that ``collectstatic`` also minifies the hashed CSS and writes ``.gz``
+(and, when the optional ``brotli`` package is installed, ``.br``)
+siblings next to every text asset. core.static_serving serves those
+siblings according to Accept-Encoding.
+"""
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml', '.ico')
+
+# Quoted strings are copied through untouched
+_CSS_TOKENS = re.compile(r'''("(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')''', re.S)
+_CSS_COMMENTS = re.compile(r'/\*.*?\*/', re.S)
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    parts = _CSS_TOKENS.split(_CSS_COMMENTS.sub('', css))
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        # A space before ':' can be a descendant selector (a :hover), so only
+        # whitespace after it is dropped; '+' and '-' matter inside calc()
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        code = re.sub(r':\s+', ':', code)
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def compress(path):
+    """Write gzip and brotli siblings of a file where they save space"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    encoded = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['.br'] = brotli.compress(data, quality=11)
+    for suffix, content in encoded.items():
+        if len(content) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(content)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also minifies CSS and precompresses text assets"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.append((name, hashed_name))
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        # Hashed names are derived from the source, so the minified file
+        # keeps a name unique to its content
+        for name, hashed_name in processed_names:
+            if hashed_name.endswith('.css'):
+                with open(self.path(hashed_name), encoding='utf-8') as f:
+                    css = f.read()
+                with open(self.path(hashed_name), 'w', encoding='utf-8', newline='\n') as f:
+                    f.write(minify_css(css))
+            for stored_name in (name, hashed_name):
+                if stored_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    compress(self.path(stored_name))
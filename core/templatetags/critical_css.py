@@ -0,0 +1,33 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from core.critical_css import get_critical_css
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def critical_stylesheets(context, *stylesheets):
+    """
+    Inline the critical CSS built for the page being rendered (see
+    core.critical_css) and load the full stylesheets without blocking
+    first paint. Without an up-to-date build the stylesheets are linked
+    normally.
+    """
+    links = format_html_join('', '<link rel="stylesheet" href="{}">', ((static(name),) for name in stylesheets))
+    origin = getattr(context.template, 'origin', None)
+    css = get_critical_css(origin.template_name, stylesheets) if origin and origin.template_name else None
+    if css is None:
+        return links
+
+    preloads = format_html_join(
+        '',
+        '<link rel="preload" as="style" href="{}" onload="this.onload=null;this.rel=\'stylesheet\'">',
+        ((static(name),) for name in stylesheets),
+    )
+    # The build output is our own minified CSS; only a closing tag could
+    # break out of the <style> element
+    css = css.replace('</', '<\\/')
+    return format_html('<style>{}</style>{}<noscript>{}</noscript>', mark_safe(css), preloads, links)
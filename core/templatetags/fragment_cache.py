@@ -0,0 +1,25 @@
+from django import template
+from django.conf import settings
+
+from core.critical_css import template_hash
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def template_version(context):
+    """
+    Hash of the page template and the templates it extends or includes,
+    for use as a {% cache %} vary_on argument so a deploy that changes the
+    markup never serves fragments rendered from the old templates.
+    """
+    origin = getattr(context.template, 'origin', None)
+    if origin is None or not origin.template_name:
+        return ''
+    return template_hash(origin.template_name)
+
+
+@register.simple_tag
+def dashboard_fragment_timeout():
+    """Seconds a role dashboard fragment stays cached (0 disables caching)"""
+    return getattr(settings, 'DASHBOARD_FRAGMENT_CACHE_TIMEOUT', 0)
@@ -1,6 +1,6 @@
 from django import template
 from django.utils.safestring import mark_safe
-import markdown
+from cms.utils import render_markdown_cached
 
 register = template.Library()
 
@@ -10,12 +10,6 @@ def markdown_to_html(text):
     if not text:
         return ''
     
-    # Configure markdown with extensions for better formatting
-    md = markdown.Markdown(extensions=[
-        'markdown.extensions.nl2br',  # Convert newlines to <br>
-        'markdown.extensions.fenced_code',  # Support for code blocks
-        'markdown.extensions.tables',  # Support for tables
-    ])
-    
-    html = md.convert(text)
+    # Identical text is only converted once per process
+    html = render_markdown_cached(text)
     return mark_safe(html)
@@ -0,0 +1,50 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+def _srcset(storage, candidates):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, _, name in candidates)
+
+
+@register.simple_tag
+def responsive_image(image, variants, sizes='100vw', display_height=None, **attrs):
+    """
+    Render an image field as <picture> with srcset from its stored variants
+    (see cms.images). Pass display_height for images shown at a fixed CSS
+    height, such as the logo, to derive sizes from the aspect ratio.
+    """
+    if not image:
+        return ''
+
+    variants = variants or {}
+    width, height = variants.get('width'), variants.get('height')
+    if width and height:
+        attrs.setdefault('width', width)
+        attrs.setdefault('height', height)
+        if display_height:
+            sizes = f'{round(int(display_height) * width / height)}px'
+
+    candidates = variants.get('variants')
+    if not candidates:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+
+    webp = list(candidates.get('webp', []))
+    fallback = next((list(sizes_list) for fmt, sizes_list in candidates.items() if fmt != 'webp'), [])
+    # The original upload is the largest candidate of its own format
+    if image.name.lower().endswith('.webp'):
+        webp.append([width, height, image.name])
+    else:
+        fallback.append([width, height, image.name])
+
+    storage = image.storage
+    source = ''
+    if webp:
+        source = format_html(
+            '<source type="image/webp" srcset="{}" sizes="{}">',
+            _srcset(storage, webp), sizes,
+        )
+    img_attrs = {'srcset': _srcset(storage, fallback), 'sizes': sizes} if fallback else {}
+    img_attrs.update(attrs)
+    return format_html('<picture>{}<img src="{}"{}></picture>', source, image.url, flatatt(img_attrs))
@@ -0,0 +1,362 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from itertools import islice
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import StreamingHttpResponse
+from django.template import Context, Template
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from cms.models import SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature, ContactMessage, StatCounter
+
+from .export import MESSAGE_EXPORT_FIELDS, MESSAGE_FREE_TEXT_FIELDS, USER_EXPORT_FIELDS, iter_export
+from . import ratelimit
+from .critical_css import build_critical_css
+from .ratelimit import SlidingWindowLimiter, client_ip
+from .routers import ReplicaRouter, reset_pinning
+
+
+class PublicViewQueryBudgetTests(TestCase):
+    """
+    Queries each public page may run for an anonymous visitor. A page
+    rendered with an empty cache stays within its budget, and a repeat
+    request is served from the cached page or SiteSettings without touching
+    the database.
+    """
+
+    # (url name, url kwargs, queries with a cold cache). Every page loads
+    # SiteSettings; CMS pages add their content and, for Last-Modified,
+    # the latest change time of each model they render
+    BUDGETS = [
+        ('home', {}, 3),
+        ('about', {}, 1),
+        ('services', {}, 3),
+        ('contact', {}, 1),
+        ('faq', {}, 3),
+        ('privacy_policy', {}, 3),
+        ('terms', {}, 3),
+        ('cookies_policy', {}, 3),
+        ('accessibility', {}, 3),
+        ('login', {}, 1),
+        ('signup', {}, 1),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.objects.create(site_name='IntimaCare')
+        HomepageSection.objects.create(title='Welcome', description='Telehealth for everyone')
+        FAQ.objects.create(question='Is it private?', answer='Yes.')
+        ServiceFeature.objects.create(name='Consultations', description='Talk to a clinician')
+        slugs = ['privacy-policy', 'terms-conditions', 'cookies-policy', 'accessibility-statement']
+        for (document_type, title), slug in zip(LegalDocument.DOCUMENT_TYPES, slugs):
+            LegalDocument.objects.create(title=title, slug=slug, document_type=document_type, content=f'# {title}')
+
+    def test_query_budgets(self):
+        for name, kwargs, budget in self.BUDGETS:
+            with self.subTest(name):
+                cache.clear()
+                url = reverse(name, kwargs=kwargs)
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        reset_pinning()
+        self.addCleanup(reset_pinning)
+        patcher = mock.patch.dict(settings.DATABASES, {'replica': settings.DATABASES['default']})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_published_content_reads_from_replica(self):
+        router = ReplicaRouter()
+        for model in (SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(router.db_for_read(model), 'replica')
+
+    def test_write_side_models_read_from_primary(self):
+        # Counters and contact messages are read to decide what to write
+        router = ReplicaRouter()
+        for model in (ContactMessage, StatCounter, User):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(router.db_for_read(model), 'default')
+
+    def test_writes_pin_reads_to_primary(self):
+        router = ReplicaRouter()
+        router.db_for_write(FAQ)
+        self.assertEqual(router.db_for_read(FAQ), 'default')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'WAL tuning applies to SQLite')
+@override_settings(
+    RATELIMIT_ENABLED=False,
+    CONTACT_SPOOL_ENABLED=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ConcurrentWriteTests(TestCase):
+    """Parallel signups and contact posts on a WAL file database all succeed"""
+
+    THREADS = 8
+    REQUESTS = 25
+
+    def setUp(self):
+        # The test database lives in memory, where WAL does not apply, so
+        # its schema is copied to a file the worker threads connect to
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'stress.sqlite3')
+        target = sqlite3.connect(self.path)
+        connection.ensure_connection()
+        connection.connection.backup(target)
+        target.close()
+
+    def signups(self, worker):
+        client = Client()
+        for i in range(self.REQUESTS):
+            response = client.post(reverse('signup_api'), {
+                'full_name': f'Patient {worker}-{i}',
+                'email': f'patient{worker}-{i}@example.com',
+                'phone': f'+1555{worker:03d}{i:04d}',
+                'password': 'Str0ng-passphrase!',
+                'confirm_password': 'Str0ng-passphrase!',
+                'role': 'PATIENT',
+            })
+            self.assertEqual(response.status_code, 201, response.content)
+
+    def contact_posts(self, worker):
+        client = Client()
+        for i in range(self.REQUESTS):
+            response = client.post(reverse('contact'), {
+                'name': f'Visitor {worker}-{i}',
+                'email': f'visitor{worker}-{i}@example.com',
+                'subject': 'Hello',
+                'message': 'Please call me back.',
+            })
+            self.assertEqual(response.status_code, 302)
+
+    def test_parallel_writers_do_not_hit_database_is_locked(self):
+        start = threading.Barrier(self.THREADS)
+        errors = []
+
+        def run(target, worker):
+            start.wait()
+            try:
+                target(worker)
+            except BaseException as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=run, args=(self.signups if worker % 2 else self.contact_posts, worker))
+            for worker in range(self.THREADS)
+        ]
+        with mock.patch.dict(connection.settings_dict, {'NAME': self.path}):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+
+        database = sqlite3.connect(self.path)
+        self.addCleanup(database.close)
+        self.assertEqual(database.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        writes = self.THREADS // 2 * self.REQUESTS
+        self.assertEqual(database.execute('SELECT COUNT(*) FROM accounts_user').fetchone()[0], writes)
+        self.assertEqual(database.execute('SELECT COUNT(*) FROM cms_contactmessage').fetchone()[0], writes)
+
+
+class ManifestStaticFilesTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cls.static_root.cleanup)
+        storage_settings = override_settings(
+            STATIC_ROOT=cls.static_root.name,
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'},
+            },
+        )
+        storage_settings.enable()
+        cls.addClassCleanup(storage_settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_static_tag_uses_hashed_name(self):
+        url = Template("{% load static %}{% static 'css/main.css' %}").render(Context())
+        self.assertRegex(url, r'^/static/css/main\.[0-9a-f]{12}\.css$')
+
+        path = os.path.join(self.static_root.name, url[len('/static/'):])
+        with open(path, encoding='utf-8') as f:
+            css = f.read()
+        self.assertNotIn('/*', css)
+        self.assertNotRegex(css, r'\n\s')
+        self.assertTrue(os.path.exists(path + '.gz'))
+
+
+class CriticalCssTests(SimpleTestCase):
+
+    def test_only_above_the_fold_rules_are_inlined(self):
+        css = build_critical_css('core/home.html')['css']
+        for selector in ('.navbar{', '.hero{', '.btn-primary{'):
+            self.assertIn(selector, css)
+        # Sections after the hero and the footer wait for main.css
+        for selector in ('.testimonials-section', '.cta-section', '.footer'):
+            self.assertNotIn(selector, css)
+
+
+class SlidingWindowLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter(rates={'login': {'ip': '5/min', 'email': '3/min'}})
+
+    def test_limit_and_retry_after(self):
+        results = [self.limiter.hit('login', [('ip', '10.0.0.1')], now=600 + i) for i in range(6)]
+        self.assertEqual(results[:5], [None] * 5)
+        self.assertGreater(results[5], 0)
+
+    def test_window_expiry(self):
+        ip = [('ip', '10.0.0.1')]
+        for i in range(5):
+            self.assertIsNone(self.limiter.hit('login', ip, now=600 + i))
+        self.assertIsNotNone(self.limiter.hit('login', ip, now=605))
+
+        # Half a minute into the next window, half of the previous 5 still count
+        self.assertIsNone(self.limiter.hit('login', ip, now=690))
+        self.assertIsNone(self.limiter.hit('login', ip, now=690))
+        self.assertIsNotNone(self.limiter.hit('login', ip, now=690))
+
+        # Once a whole window has passed the full allowance is back
+        results = [self.limiter.hit('login', ip, now=780) for _ in range(6)]
+        self.assertEqual(results, [None] * 5 + [results[5]])
+        self.assertIsNotNone(results[5])
+
+    def test_window_expiring_before_rejection_is_undone(self):
+        ip = [('ip', '10.0.0.1')]
+        for i in range(5):
+            self.limiter.hit('login', ip, now=600 + i)
+        # The counter expires between incr() and decr()
+        with mock.patch.object(cache, 'decr', side_effect=ValueError), \
+                mock.patch.object(ratelimit, '_local_cache') as local_cache:
+            self.assertIsNotNone(self.limiter.hit('login', ip, now=605))
+        local_cache.incr.assert_not_called()
+
+    def test_rejected_requests_are_not_counted(self):
+        idents = [('ip', '10.0.0.1'), ('email', 'a@example.com')]
+        for i in range(3):
+            self.assertIsNone(self.limiter.hit('login', idents, now=600 + i))
+        self.assertIsNotNone(self.limiter.hit('login', idents, now=603))
+        # The email limit rejected the request, so the IP still has room
+        self.assertIsNone(self.limiter.hit('login', [('ip', '10.0.0.1'), ('email', 'b@example.com')], now=604))
+
+    def test_concurrent_requests_cannot_share_one_allowance(self):
+        results = []
+        barrier = threading.Barrier(20)
+
+        def hit():
+            barrier.wait()
+            results.append(self.limiter.hit('login', [('ip', '10.0.0.1')]))
+
+        threads = [threading.Thread(target=hit) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(result is None for result in results), 5)
+
+    def test_client_ip_behind_proxy(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.254', HTTP_X_REAL_IP='203.0.113.7')
+        self.assertEqual(client_ip(request), '10.0.0.254')
+        with override_settings(RATELIMIT_IP_HEADER='HTTP_X_REAL_IP'):
+            self.assertEqual(client_ip(request), '203.0.113.7')
+        with override_settings(RATELIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            request.META['HTTP_X_FORWARDED_FOR'] = '198.51.100.1, 203.0.113.7'
+            self.assertEqual(client_ip(request), '203.0.113.7')
+            del request.META['HTTP_X_FORWARDED_FOR']
+            self.assertEqual(client_ip(request), '10.0.0.254')
+
+
+class ExportTests(TestCase):
+
+    def test_user_phone_numbers_are_exported_unchanged(self):
+        User.objects.create_user('patient', 'patient@example.com', 'x', phone='+254700000001')
+        lines = list(iter_export(User.objects.all(), USER_EXPORT_FIELDS, 'csv'))
+        self.assertIn(',+254700000001,', lines[1])
+
+    def test_contact_free_text_is_escaped(self):
+        ContactMessage.objects.create(name='=HYPERLINK("x")', email='a@example.com', subject='-1', message='+1')
+        lines = list(iter_export(
+            ContactMessage.objects.all(), MESSAGE_EXPORT_FIELDS, 'csv', escape=MESSAGE_FREE_TEXT_FIELDS,
+        ))
+        self.assertIn("'=HYPERLINK", lines[1])
+        self.assertIn(",'-1,'+1,", lines[1])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'Rows are generated with SQLite SQL')
+    def test_admin_export_of_500k_users_streams_in_constant_memory(self):
+        rows = 500000
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s) '
+                f'INSERT INTO {User._meta.db_table} (password, is_superuser, username, first_name, last_name, '
+                f'email, is_staff, is_active, date_joined, full_name, phone, role, is_verified) '
+                f"SELECT '!', 0, 'user' || n, '', '', 'user' || n || '@example.com', 0, 1, %s, "
+                f"'Patient ' || n, '+2547' || n, 'PATIENT', 0 FROM seq",
+                [rows, connection.ops.adapt_datetimefield_value(timezone.now())],
+            )
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin-password')
+        self.client.force_login(admin)
+
+        # Tracing every allocation of a 500k-row export takes minutes, so
+        # memory is traced over the request and first 20k lines, which would
+        # show rows loaded up front, and over the last 20k lines, where
+        # memory held per row would show as growth
+        window = 20000
+        tracemalloc.start()
+        try:
+            response = self.client.post(reverse('admin:accounts_user_changelist'), {
+                'action': 'export_csv', 'select_across': '1', 'index': '0', '_selected_action': [admin.pk],
+            })
+            lines = iter(response.streaming_content)
+            for _ in islice(lines, window):
+                pass
+            _, first_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertIsInstance(response, StreamingHttpResponse)
+
+        # Header, the generated users and the admin
+        middle = rows + 2 - 2 * window
+        self.assertEqual(sum(1 for _ in islice(lines, middle)), middle)
+
+        tracemalloc.start()
+        try:
+            self.assertEqual(sum(1 for _ in islice(lines, window)), window)
+            last_growth, last_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertIsNone(next(lines, None))
+        response.close()
+
+        self.assertLess(first_peak, 5 * 1024 * 1024)
+        self.assertLess(last_peak, 5 * 1024 * 1024)
+        self.assertLess(last_growth, 1024 * 1024)
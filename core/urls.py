@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Native async views avoid a thread hop per request under ASGI
+if settings.CORE_ASYNC_VIEWS:
+    home, services, contact, faq, legal_document = (
+        views.home_async, views.services_async, views.contact_async,
+        views.faq_async, views.legal_document_async,
+    )
+else:
+    home, services, contact, faq, legal_document = (
+        views.home, views.services, views.contact, views.faq, views.legal_document,
+    )
+
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', home, name='home'),
     path('about/', views.about, name='about'),
-    path('services/', views.services, name='services'),
-    path('contact/', views.contact, name='contact'),
-    path('faq/', views.faq, name='faq'),
-    path('privacy-policy/', views.legal_document, {'slug': 'privacy-policy'}, name='privacy_policy'),
-    path('terms/', views.legal_document, {'slug': 'terms-conditions'}, name='terms'),
-    path('cookies-policy/', views.legal_document, {'slug': 'cookies-policy'}, name='cookies_policy'),
-    path('accessibility/', views.legal_document, {'slug': 'accessibility-statement'}, name='accessibility'),
+    path('services/', services, name='services'),
+    path('contact/', contact, name='contact'),
+    path('faq/', faq, name='faq'),
+    path('privacy-policy/', legal_document, {'slug': 'privacy-policy'}, name='privacy_policy'),
+    path('terms/', legal_document, {'slug': 'terms-conditions'}, name='terms'),
+    path('cookies-policy/', legal_document, {'slug': 'cookies-policy'}, name='cookies_policy'),
+    path('accessibility/', legal_document, {'slug': 'accessibility-statement'}, name='accessibility'),
 ]
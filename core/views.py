@@ -1,10 +1,18 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
+from django.conf import settings
+from django.http import Http404
 from django.views.generic import TemplateView
-from cms.models import SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature
+from cms.models import SiteSettings, HomepageSection, FAQ, LegalDocument, ServiceFeature, ContactMessage
+from cms.cache import cms_page_cache, cms_conditional, aget_site_settings
+from cms.spool import enqueue_contact_message
+from .ratelimit import ratelimit
 from .forms import ContactForm
 
 
+@cms_conditional(HomepageSection)
+@cms_page_cache(HomepageSection)
 def home(request):
     """Homepage view"""
     homepage_sections = HomepageSection.objects.filter(active=True)
@@ -14,11 +22,15 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+@cms_conditional()
+@cms_page_cache()
 def about(request):
     """About page view"""
     return render(request, 'core/about.html')
 
 
+@cms_conditional(ServiceFeature)
+@cms_page_cache(ServiceFeature)
 def services(request):
     """Services page view"""
     service_features = ServiceFeature.objects.filter(active=True)
@@ -28,12 +40,16 @@ def services(request):
     return render(request, 'core/services.html', context)
 
 
+@ratelimit('contact')
 def contact(request):
     """Contact page view with form handling"""
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            form.save()
+            if settings.CONTACT_SPOOL_ENABLED:
+                enqueue_contact_message(form.cleaned_data)
+            else:
+                form.save()
             messages.success(request, 'Thank you for your message! We will get back to you soon.')
             return redirect('contact')
         else:
@@ -47,6 +63,8 @@ def contact(request):
     return render(request, 'core/contact.html', context)
 
 
+@cms_conditional(FAQ)
+@cms_page_cache(FAQ)
 def faq(request):
     """FAQ page view"""
     faqs = FAQ.objects.filter(active=True)
@@ -56,6 +74,8 @@ def faq(request):
     return render(request, 'core/faq.html', context)
 
 
+@cms_conditional(LegalDocument)
+@cms_page_cache(LegalDocument)
 def legal_document(request, slug):
     """Legal document view (Privacy, Terms, etc.)"""
     document = get_object_or_404(LegalDocument, slug=slug)
@@ -63,3 +83,83 @@ def legal_document(request, slug):
         'document': document,
     }
     return render(request, 'core/legal_document.html', context)
+
+
+# Async views (served under ASGI, see CORE_ASYNC_VIEWS)
+async def arender(request, template_name, context=None):
+    """Render a template from an async view without blocking on the database"""
+    request.site_settings = await aget_site_settings()
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        # Loading the session and user may query the database
+        await sync_to_async(lambda: request.user.is_authenticated)()
+    return render(request, template_name, context)
+
+
+@cms_conditional(HomepageSection)
+@cms_page_cache(HomepageSection)
+async def home_async(request):
+    """Homepage view"""
+    homepage_sections = [section async for section in HomepageSection.objects.filter(active=True)]
+    context = {
+        'homepage_sections': homepage_sections,
+    }
+    return await arender(request, 'core/home.html', context)
+
+
+@cms_conditional(ServiceFeature)
+@cms_page_cache(ServiceFeature)
+async def services_async(request):
+    """Services page view"""
+    service_features = [feature async for feature in ServiceFeature.objects.filter(active=True)]
+    context = {
+        'service_features': service_features,
+    }
+    return await arender(request, 'core/services.html', context)
+
+
+@ratelimit('contact')
+async def contact_async(request):
+    """Contact page view with form handling"""
+    if request.method == 'POST':
+        form = ContactForm(request.POST)
+        if form.is_valid():
+            if settings.CONTACT_SPOOL_ENABLED:
+                await sync_to_async(enqueue_contact_message, thread_sensitive=False)(form.cleaned_data)
+            else:
+                await ContactMessage.objects.acreate(**form.cleaned_data)
+            messages.success(request, 'Thank you for your message! We will get back to you soon.')
+            return redirect('contact')
+        else:
+            messages.error(request, 'Please correct the errors below.')
+    else:
+        form = ContactForm()
+    
+    context = {
+        'form': form,
+    }
+    return await arender(request, 'core/contact.html', context)
+
+
+@cms_conditional(FAQ)
+@cms_page_cache(FAQ)
+async def faq_async(request):
+    """FAQ page view"""
+    faqs = [faq async for faq in FAQ.objects.filter(active=True)]
+    context = {
+        'faqs': faqs,
+    }
+    return await arender(request, 'core/faq.html', context)
+
+
+@cms_conditional(LegalDocument)
+@cms_page_cache(LegalDocument)
+async def legal_document_async(request, slug):
+    """Legal document view (Privacy, Terms, etc.)"""
+    try:
+        document = await LegalDocument.objects.aget(slug=slug)
+    except LegalDocument.DoesNotExist:
+        raise Http404('No LegalDocument matches the given query.')
+    context = {
+        'document': document,
+    }
+    return await arender(request, 'core/legal_document.html', context)
@@ -0,0 +1,23 @@
+"""
+Process pools for CPU-bound management commands
+
+``import_users`` hashes passwords and ``build_image_variants`` resizes
+images across processes. Forked workers must not share the parent's
+database connections, and spawned workers (e.g. on Windows) start without
+Django configured. Web requests should not start pools: forking a
+threaded server process per request is expensive and unsafe.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def process_pool(workers):
+    """A ProcessPoolExecutor whose workers can use Django; not for use inside a transaction"""
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=max(1, workers), initializer=init_worker)
@@ -24,15 +24,71 @@ ALLOWED_HOSTS = [
 #         'USER': 'yourusername',
 #         'PASSWORD': config('DB_PASSWORD'),
 #         'HOST': 'yourusername.mysql.pythonanywhere-services.com',
+#         'CONN_MAX_AGE': 300,  # keep below MySQL wait_timeout
+#         'CONN_HEALTH_CHECKS': True,
 #         'OPTIONS': {
 #             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
 #         },
 #     }
 # }
 
+# Persistent connections for the default (SQLite) database
+DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=600, cast=int)
+
+# Shared cache so every web worker sees CMS cache invalidations. It also
+# holds sessions, rate limit counters and cached pages, so use Redis when
+# one is available (`pip install redis`): its incr() is atomic across
+# processes and it evicts least recently used keys.
+#
+# The file cache fallback lists its whole directory on every set and, once
+# CACHE_MAX_ENTRIES is reached, deletes 1/CULL_FREQUENCY of the entries at
+# random. Size it well above the expected number of sessions and cached
+# pages. Culled sessions are reloaded from the database, but culled rate
+# limit counters start again from zero
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            # A directory of its own: CACHE_LOCATION is the locmem name in .env
+            'LOCATION': config('CACHE_DIR', default=os.path.join(BASE_DIR, 'cache')),
+            'OPTIONS': {
+                'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int),
+                'CULL_FREQUENCY': 10,
+            },
+        }
+    }
+
+# Both backends above are shared between workers, so sessions can be
+# served from the cache (see settings.SESSION_ENGINE)
+SESSION_ENGINE = config('SESSION_ENGINE', default='accounts.sessions')
+
+# PythonAnywhere's proxy is REMOTE_ADDR for every request and passes the
+# visitor's address in X-Real-IP, which rate limits must key on
+RATELIMIT_IP_HEADER = config('RATELIMIT_IP_HEADER', default='HTTP_X_REAL_IP')
+
 # Static files configuration for production
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STORAGES['staticfiles']['BACKEND'] = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+SERVE_STATIC = config('SERVE_STATIC', default=True, cast=bool)
+
+# Parse each template once per process (settings.py only does this when
+# DEBUG was off at import time)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
 
 # Media files configuration
 MEDIA_URL = '/media/'
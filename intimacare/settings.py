@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     
     # Local apps
@@ -62,6 +63,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +71,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'intimacare.urls'
@@ -90,7 +93,23 @@ TEMPLATES = [
     },
 ]
 
+# Keep parsed templates in memory outside development. Listing the loaders
+# explicitly requires APP_DIRS to be off; the app_directories loader
+# below takes its place
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'intimacare.wsgi.application'
+ASGI_APPLICATION = 'intimacare.asgi.application'
+
+# Serve the public pages with native async views (use when running under ASGI)
+CORE_ASYNC_VIEWS = config('CORE_ASYNC_VIEWS', default=False, cast=bool)
 
 
 # Database
@@ -100,9 +119,81 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections between requests, checking them before reuse
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,  # seconds to wait for a lock before "database is locked"
+        },
     }
 }
 
+# New SQLite connections are switched to WAL with a busy timeout by
+# core/db.py; set SQLITE_PRAGMAS here to override its defaults
+
+# Optional read replica for CMS content (see core/routers.py). Locally this
+# can be a second SQLite file refreshed with `manage.py sync_replica`.
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+if DB_REPLICA_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / DB_REPLICA_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a client's reads stay on the primary after it writes
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Count queries per request, send a Server-Timing header and log requests
+# over either threshold with their costliest SQL (see
+# core.middleware.QueryCountMiddleware). Off by default; when off the
+# middleware removes itself at startup
+QUERY_COUNT_ENABLED = config('QUERY_COUNT_ENABLED', default=False, cast=bool)
+QUERY_COUNT_THRESHOLD = config('QUERY_COUNT_THRESHOLD', default=50, cast=int)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory is per process; use a shared backend (see production_settings)
+# when running several workers so CMS invalidations reach all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='intimacare'),
+    }
+}
+
+# Seconds an anonymous public page stays cached (CMS edits purge it earlier)
+CMS_PAGE_CACHE_TIMEOUT = config('CMS_PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Seconds the admin dashboard statistics are reused (0 disables caching)
+ADMIN_DASHBOARD_CACHE_TIMEOUT = config('ADMIN_DASHBOARD_CACHE_TIMEOUT', default=30, cast=int)
+
+# Seconds the role dashboards' sidebar fragment is reused (0 disables caching)
+DASHBOARD_FRAGMENT_CACHE_TIMEOUT = config('DASHBOARD_FRAGMENT_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Spool contact form submissions to disk and insert them in batches with
+# `manage.py drain_contact_spool --loop` instead of one INSERT per POST
+CONTACT_SPOOL_ENABLED = config('CONTACT_SPOOL_ENABLED', default=False, cast=bool)
+CONTACT_SPOOL_DIR = config('CONTACT_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'contact'))
+CONTACT_SPOOL_BATCH_SIZE = config('CONTACT_SPOOL_BATCH_SIZE', default=500, cast=int)
+
+# Sliding-window limits for the login, signup and contact endpoints, per client
+# IP and per submitted email (see core.ratelimit)
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+# META key holding the client address set by a trusted reverse proxy, e.g.
+# HTTP_X_REAL_IP on PythonAnywhere. Empty means REMOTE_ADDR is the client
+RATELIMIT_IP_HEADER = config('RATELIMIT_IP_HEADER', default='')
+RATELIMIT_RATES = {
+    'login': {'ip': '30/min', 'email': '10/min'},
+    'signup': {'ip': '10/hour', 'email': '5/hour'},
+    'contact': {'ip': '5/min', 'email': '10/hour'},
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -144,6 +235,29 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Fingerprint, minify and precompress static files in collectstatic. Pages
+# then need a collected manifest, so this is off by default while DEBUG is on
+STATIC_MANIFEST = config('STATIC_MANIFEST', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'core.staticfiles.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Serve STATIC_ROOT from the WSGI/ASGI application with precompressed
+# variants and immutable caching (see core.static_serving)
+SERVE_STATIC = config('SERVE_STATIC', default=STATIC_MANIFEST, cast=bool)
+
+# Above-the-fold CSS inlined by {% critical_stylesheets %}, written by
+# `manage.py build_critical_css` after collectstatic (see core.critical_css)
+CRITICAL_CSS_MANIFEST = config('CRITICAL_CSS_MANIFEST', default=str(STATIC_ROOT / 'critical-css.json'))
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -156,10 +270,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Email login with a single user lookup (replaces ModelBackend)
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.EmailBackend',
+]
+
+# Worker pool for password hashing in the async auth API views; requests
+# beyond workers + queue get a 503 with Retry-After (seconds)
+AUTH_POOL_WORKERS = config('AUTH_POOL_WORKERS', default=4, cast=int)
+AUTH_POOL_QUEUE = config('AUTH_POOL_QUEUE', default=16, cast=int)
+AUTH_POOL_RETRY_AFTER = config('AUTH_POOL_RETRY_AFTER', default=1, cast=int)
+
+# Bulk user import (`manage.py import_users` and the user admin): rows per
+# bulk_create batch and processes hashing passwords (0 means CPU count)
+USER_IMPORT_BATCH_SIZE = config('USER_IMPORT_BATCH_SIZE', default=500, cast=int)
+USER_IMPORT_WORKERS = config('USER_IMPORT_WORKERS', default=0, cast=int)
+# Admin uploads are hashed inside the request, one password at a time, up to
+# this many rows; larger files are queued for `manage.py import_users --queued`
+USER_IMPORT_ADMIN_MAX_ROWS = config('USER_IMPORT_ADMIN_MAX_ROWS', default=50, cast=int)
+USER_IMPORT_QUEUE_DIR = config('USER_IMPORT_QUEUE_DIR', default=str(BASE_DIR / 'spool' / 'imports'))
+
 # Django REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -188,8 +322,19 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.ClaimsTokenRefreshSerializer',
 }
 
+# Seconds a user's active/role state is cached for JWT claim checks; admin
+# changes invalidate it immediately, this bounds staleness across caches
+JWT_USER_STATE_CACHE_TIMEOUT = config('JWT_USER_STATE_CACHE_TIMEOUT', default=5, cast=int)
+
+# In-memory revocation filter for blacklisted refresh tokens: expected number
+# of live blacklist entries, seconds between forced syncs and full rebuilds
+JWT_REVOCATION_CAPACITY = config('JWT_REVOCATION_CAPACITY', default=1000000, cast=int)
+JWT_REVOCATION_SYNC_INTERVAL = config('JWT_REVOCATION_SYNC_INTERVAL', default=5, cast=int)
+JWT_REVOCATION_REBUILD_INTERVAL = config('JWT_REVOCATION_REBUILD_INTERVAL', default=600, cast=int)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -214,6 +359,15 @@ X_FRAME_OPTIONS = 'DENY'
 SESSION_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_AGE = 3600  # 1 hour
+# Cache-backed sessions that skip unchanged writes (see accounts/sessions.py).
+# A per-process cache would keep serving a session other workers logged out,
+# so they are only the default when CACHE_BACKEND is shared
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache'))
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='accounts.sessions' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = config('SESSION_CACHE_ALIAS', default='default')
 
 # CSRF Settings
 CSRF_COOKIE_SECURE = not DEBUG
@@ -49,6 +49,10 @@ echo.
 echo Collecting static files...
 python manage.py collectstatic --noinput
 
+echo.
+echo Extracting critical CSS...
+python manage.py build_critical_css
+
 echo.
 echo ========================================
 echo           Setup Complete!